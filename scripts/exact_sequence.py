@@ -10,10 +10,16 @@ worked in the capture.
 
 import os
 import sys
+import errno
 import time
+import queue
+import threading
 import struct
 import argparse
+import itertools
+import collections
 import logging
+from array import array
 import usb.core
 import usb.util
 
@@ -32,36 +38,83 @@ EP_OUT = 0x02
 EP_IN = 0x81
 CBW_SIGNATURE = 0x43425355  # "USBC" in little-endian
 CSW_SIGNATURE = 0x53425355  # "USBS" in little-endian
+CSW_MAGIC = b'USBS'
+_CBW_STRUCT = struct.Struct('<IIIBBBB')
+_CSW_STRUCT = struct.Struct('<IIIB')
+_TAG_STRUCT = struct.Struct('<I')
+CSW = collections.namedtuple('CSW', 'signature tag data_residue status')
+
+COALESCE_MAX = 4096  # Largest data phase that is merged into the CBW write
+PRELOAD_LIMIT = 512 * 1024 * 1024  # Largest frame set kept in memory
+MAX_RETRY_DELAY = 1.0  # Cap on the back-off between command retries (seconds)
+
+# Command blocks, built once rather than per send
+TUR_CMD = bytes(6)                                   # TEST UNIT READY
+INIT_DISPLAY_CMD = bytes([0xF5, 0x01]) + bytes(10)   # F5 01 (Initialize Display)
+STOP_ANIM_CMD = bytes([0xF5, 0x10]) + bytes(10)      # F5 10 (Stop Animation)
+SET_MODE_CMD = bytes([0xF5, 0x20]) + bytes(10)       # F5 20 (Set Mode)
+CLEAR_SCREEN_CMD = bytes([0xF5, 0xA0]) + bytes(10)   # F5 A0 (Clear Screen)
+DISPLAY_IMAGE_CMD = bytes([0xF5, 0xB0]) + bytes(10)  # F5 B0 (Display Image)
+SET_MODE_DATA = bytes([0x05, 0x00, 0x00, 0x00])
+STOP_ANIM_DATA = bytes([0x00])
 
 class ExactSequencer:
-    def __init__(self, frames_dir=None, verbose=False):
+    def __init__(self, frames_dir=None, verbose=False, preload=True):
         self.device = None
         self.frames_dir = frames_dir
         self.frames = []
+        self.frame_data = []
         self.verbose = verbose
-        self.tag = 1
+        self.log_level = logging.INFO if verbose else logging.DEBUG
+        self._tag_counter = itertools.count(1)  # Masked to 32 bits on use
+        self.pending_csw_tag = None  # Tag of a command whose CSW is still unread
+        self.last_ep = EP_OUT  # Endpoint of the most recent transfer, for halt recovery
+        self.coalesce_out = True  # Merge small data phases into the CBW write
         
         if frames_dir and os.path.exists(frames_dir):
-            self.load_frames(frames_dir)
+            self.load_frames(frames_dir, preload=preload)
     
-    def log(self, message):
-        """Print message if verbose mode is enabled."""
-        if self.verbose:
-            logger.info(message)
-        else:
-            logger.debug(message)
+    def log(self, message, *args):
+        """
+        Log at INFO in verbose mode, DEBUG otherwise.
+        
+        Arguments are %-formatted lazily by logging, so call sites pay nothing
+        for messages that are filtered out.
+        """
+        logger.log(self.log_level, message, *args)
     
-    def load_frames(self, directory):
-        """Load binary frames from the specified directory."""
-        self.log(f"Loading frames from {directory}")
-        files = [f for f in os.listdir(directory) if f.endswith('.bin')]
-        files.sort()  # Sort to ensure consistent order
+    def load_frames(self, directory, preload=True):
+        """
+        Load binary frames from the specified directory.
+        
+        With preload enabled, frame payloads are read into memory up front so
+        Phase 4 never waits on disk, unless the set exceeds PRELOAD_LIMIT.
+        """
+        self.log("Loading frames from %s", directory)
+        # scandir entries carry the directory's file type and cache their
+        # stat result, so listing and sizing the frames costs one stat each
+        with os.scandir(directory) as it:
+            entries = [e for e in it if e.name.endswith('.bin')]
+        entries.sort(key=lambda e: e.name)  # Sort to ensure consistent order
+        
+        total_size = 0
+        for entry in entries:
+            size = entry.stat().st_size
+            self.log("Found frame: %s (%d bytes)", entry.name, size)
+            self.frames.append(entry.path)
+            total_size += size
+        
+        if not preload:
+            return
         
-        for file in files:
-            filepath = os.path.join(directory, file)
-            size = os.path.getsize(filepath)
-            self.log(f"Found frame: {file} ({size} bytes)")
-            self.frames.append(filepath)
+        if total_size > PRELOAD_LIMIT:
+            logger.info(f"Frames total {total_size} bytes, reading them from disk during Phase 4")
+            return
+        
+        for filepath in self.frames:
+            with open(filepath, 'rb') as f:
+                self.frame_data.append(f.read())
+        self.log("Preloaded %d frames (%d bytes)", len(self.frame_data), total_size)
     
     def connect(self):
         """Connect to the ALi LCD device."""
@@ -71,7 +124,7 @@ class ExactSequencer:
         if self.device is None:
             raise ValueError("Device not found")
         
-        self.log(f"Device found: {self.device}")
+        self.log("Device found: %s", self.device)
         
         # Detach kernel driver if active
         if self.device.is_kernel_driver_active(0):
@@ -96,12 +149,12 @@ class ExactSequencer:
         
         self.log("Device connected successfully")
     
-    def create_cbw(self, cmd, data_len=0, direction_in=False):
+    def create_cbw(self, cmd, data_len=0, direction_in=False, tag=0):
         """Create a Command Block Wrapper (CBW)."""
         flags = 0x80 if direction_in else 0x00
-        cbw = struct.pack('<IIIBBBB',
+        cbw = _CBW_STRUCT.pack(
                    CBW_SIGNATURE,    # dCBWSignature
-                   self.tag,         # dCBWTag
+                   tag,              # dCBWTag
                    data_len,         # dCBWDataTransferLength
                    flags,            # bmCBWFlags
                    0,                # bCBWLUN
@@ -115,80 +168,160 @@ class ExactSequencer:
         if len(data) != 13:
             raise ValueError(f"Invalid CSW length: {len(data)}")
         
-        signature, tag, data_residue, status = struct.unpack('<IIIB', data)
+        signature, tag, data_residue, status = _CSW_STRUCT.unpack(data)
         
         if signature != CSW_SIGNATURE:
             raise ValueError(f"Invalid CSW signature: 0x{signature:08X}")
         
-        return {
-            'signature': signature,
-            'tag': tag,
-            'data_residue': data_residue,
-            'status': status
-        }
+        return CSW(signature, tag, data_residue, status)
     
-    def send_command(self, cmd, data=None, read_len=0, retry_count=3, ignore_errors=False):
-        """Send a command to the device and handle the response."""
-        if data is None:
-            data = b''
+    def reap_csw(self):
+        """
+        Read the CSW left unread by tur_burst(), if one is pending.
         
-        data_len = len(data) if data else read_len
-        direction_in = read_len > 0
+        Bulk-only transport requires the CSW to be read before the next CBW, so
+        every command calls this first. Errors are logged and swallowed because
+        the burst's commands are best-effort by definition.
+        """
+        if self.pending_csw_tag is None:
+            return None
         
-        # Create CBW
-        cbw = self.create_cbw(cmd, data_len, direction_in)
-        current_tag = self.tag
-        self.tag = (self.tag + 1) & 0xFFFFFFFF  # Increment and wrap at 32 bits
+        tag = self.pending_csw_tag
+        self.pending_csw_tag = None
+        try:
+            return self.parse_csw(self.device.read(EP_IN, 13, timeout=5000))
+        except usb.core.USBError as e:
+            self.log("USB Error reading deferred CSW (tag=%d): %s", tag, e)
+            if e.errno == errno.EPIPE or "Pipe error" in str(e):
+                try:
+                    self.device.clear_halt(EP_IN)
+                except:
+                    self.log("Failed to clear halts")
+        except ValueError as e:
+            self.log("Invalid deferred CSW (tag=%d): %s", tag, e)
+        return None
+    
+    def _send_no_data(self, cmd, retry_count=3, ignore_errors=False, max_delay=MAX_RETRY_DELAY):
+        """Send a command without a data phase (e.g. TEST UNIT READY)."""
+        self.reap_csw()
+        current_tag = next(self._tag_counter) & 0xFFFFFFFF
+        cbw = self.create_cbw(cmd, 0, False, current_tag)
+        return self._do_cbw_csw(cmd, current_tag, self._phase_none, (cbw,),
+                                retry_count, ignore_errors, max_delay)
+    
+    def _send_out(self, cmd, data, retry_count=3, ignore_errors=False, max_delay=MAX_RETRY_DELAY):
+        """Send a command followed by a host-to-device data phase."""
+        self.reap_csw()
+        current_tag = next(self._tag_counter) & 0xFFFFFFFF
+        cbw = self.create_cbw(cmd, len(data), False, current_tag)
+        return self._do_cbw_csw(cmd, current_tag, self._phase_out, (cbw, data),
+                                retry_count, ignore_errors, max_delay)
+    
+    def _send_in(self, cmd, read_len, retry_count=3, ignore_errors=False, max_delay=MAX_RETRY_DELAY):
+        """Send a command followed by a device-to-host data phase."""
+        self.reap_csw()
+        current_tag = next(self._tag_counter) & 0xFFFFFFFF
+        cbw = self.create_cbw(cmd, read_len, True, current_tag)
+        return self._do_cbw_csw(cmd, current_tag, self._phase_in, (cbw, read_len),
+                                retry_count, ignore_errors, max_delay)
+    
+    def _phase_none(self, cbw):
+        self.last_ep = EP_OUT
+        self.device.write(EP_OUT, cbw)
+        return None, None
+    
+    def _phase_out(self, cbw, data):
+        # Small data phases go out in the same bulk write as the CBW, saving
+        # one kernel round-trip. On the wire this is not the same as two
+        # writes: the data shares the CBW's packet, while bulk-only transport
+        # expects the CBW alone as a 31-byte packet, so it only works on
+        # firmware that tolerates it. If the device stalls the combined
+        # write, the halt is cleared and CBW and data are written separately
+        # from then on. Large (frame) payloads are always written separately
+        # so an array payload reaches libusb without being copied.
+        self.log("Sending %d bytes of data", len(data))
+        self.last_ep = EP_OUT
+        if self.coalesce_out and len(data) <= COALESCE_MAX:
+            try:
+                self.device.write(EP_OUT, cbw + data)
+                return None, None
+            except usb.core.USBError as e:
+                if e.errno != errno.EPIPE and "Pipe error" not in str(e):
+                    raise
+                self.log("Combined CBW and data write stalled, writing them separately")
+                self.coalesce_out = False
+                self.device.clear_halt(EP_OUT)
+        self.device.write(EP_OUT, cbw)
+        self.device.write(EP_OUT, data)
+        return None, None
+    
+    def _phase_in(self, cbw, read_len):
+        self.last_ep = EP_OUT
+        self.device.write(EP_OUT, cbw)
+        self.log("Reading %d bytes of data", read_len)
+        self.last_ep = EP_IN
         
-        # Send CBW
+        # Ask for the data and the CSW in one read. The CSW is a short packet,
+        # so a full data phase is returned with the CSW appended. If the device
+        # ends the data phase early the tail won't carry the CSW signature and
+        # the caller reads the CSW separately.
+        combined = self.device.read(EP_IN, read_len + 13, timeout=5000)
+        if len(combined) >= 13 and combined[-13:-9].tobytes() == CSW_MAGIC:
+            return combined[:-13], combined[-13:]
+        return combined, None
+    
+    def _do_cbw_csw(self, cmd, current_tag, phase, phase_args, retry_count, ignore_errors,
+                    max_delay=MAX_RETRY_DELAY):
+        """
+        Run the command and data phases, then read and check the CSW.
+        
+        phase(*phase_args) writes the CBW plus any data phase and returns a
+        (response_data, csw_data) pair; csw_data is None unless the phase
+        already read the CSW. Retries and halt recovery are handled here;
+        the back-off between attempts never exceeds max_delay, so a stalled
+        device cannot push a timed phase past its end.
+        """
         attempts = 0
         while attempts < retry_count:
             try:
                 # Send command
-                self.log(f"Sending command: {' '.join(f'{b:02X}' for b in cmd)} (tag={current_tag})")
-                self.device.write(EP_OUT, cbw)
-                
-                # Send or receive data if needed
-                if data:
-                    self.log(f"Sending {len(data)} bytes of data")
-                    self.device.write(EP_OUT, data)
-                elif read_len:
-                    self.log(f"Reading {read_len} bytes of data")
-                    response_data = self.device.read(EP_IN, read_len, timeout=5000)
-                else:
-                    response_data = None
+                if logger.isEnabledFor(self.log_level):
+                    self.log("Sending command: %s (tag=%d)", cmd.hex().upper(), current_tag)
+                response_data, csw_data = phase(*phase_args)
                 
                 # Read CSW
-                csw_data = self.device.read(EP_IN, 13, timeout=5000)
+                if csw_data is None:
+                    self.last_ep = EP_IN
+                    csw_data = self.device.read(EP_IN, 13, timeout=5000)
                 csw = self.parse_csw(csw_data)
                 
                 # Check status
-                if csw['status'] != 0 and not ignore_errors:
-                    self.log(f"Command failed with status: {csw['status']}")
+                if csw.status != 0 and not ignore_errors:
+                    self.log("Command failed with status: %d", csw.status)
                     if attempts < retry_count - 1:
                         attempts += 1
-                        time.sleep(0.2 * (attempts + 1))  # Exponential backoff
+                        time.sleep(min(max_delay, 0.2 * (attempts + 1)))  # Capped backoff
                         continue
                 
                 # Return response and CSW
                 return response_data, csw
                 
             except usb.core.USBError as e:
-                self.log(f"USB Error: {e}")
+                self.log("USB Error: %s", e)
                 
-                # Handle pipe errors
-                if "Pipe error" in str(e):
-                    self.log("Clearing endpoint halts")
+                # Handle pipe errors: only the endpoint that stalled needs
+                # CLEAR_FEATURE(ENDPOINT_HALT), each of which is a control transfer
+                if e.errno == errno.EPIPE or "Pipe error" in str(e):
+                    self.log("Clearing halt on endpoint 0x%02X", self.last_ep)
                     try:
-                        self.device.clear_halt(EP_OUT)
-                        self.device.clear_halt(EP_IN)
+                        self.device.clear_halt(self.last_ep)
                     except:
                         self.log("Failed to clear halts")
                 
                 # Retry or raise
                 if attempts < retry_count - 1:
                     attempts += 1
-                    time.sleep(0.2 * (attempts + 1))  # Exponential backoff
+                    time.sleep(min(max_delay, 0.2 * (attempts + 1)))  # Capped backoff
                 else:
                     if ignore_errors:
                         return None, None
@@ -196,6 +329,135 @@ class ExactSequencer:
         
         raise RuntimeError(f"Command failed after {retry_count} retries")
     
+    def send_command(self, cmd, data=None, read_len=0, retry_count=3, ignore_errors=False,
+                     max_delay=MAX_RETRY_DELAY):
+        """
+        Send a command to the device and handle the response.
+        
+        Dispatches to _send_out, _send_in or _send_no_data. Hot loops call the
+        specialised method directly to skip the dispatch.
+        """
+        if data:
+            return self._send_out(cmd, data, retry_count, ignore_errors, max_delay)
+        if read_len:
+            return self._send_in(cmd, read_len, retry_count, ignore_errors, max_delay)
+        return self._send_no_data(cmd, retry_count, ignore_errors, max_delay)
+    
+    def tur_burst(self, end_time, period, state_name, error_delay=0.5, log_every=0):
+        """
+        Send TEST UNIT READY every `period` seconds until `end_time` (a
+        time.monotonic() value).
+        
+        This is the Phase 1/2 hot loop, so it bypasses send_command: one CBW
+        buffer is reused with only the tag patched in, USB and clock calls are
+        bound to locals, and nothing is logged per command. Commands run on a
+        fixed deadline schedule and each CSW is read just before the next CBW,
+        so the USB turnaround falls inside the interval instead of adding to
+        it. CSW status is ignored, as these commands only keep the device busy.
+        
+        Returns the number of commands sent.
+        """
+        self.reap_csw()
+        
+        cbw = bytearray(self.create_cbw(TUR_CMD, 0, False, 0))
+        pack_tag = _TAG_STRUCT.pack_into
+        tags = self._tag_counter
+        write = self.device.write
+        read = self.device.read
+        now = time.monotonic
+        sleep = time.sleep
+        
+        start_time = now()
+        next_send = start_time
+        cmd_count = 0
+        pending_tag = None
+        while now() < end_time:
+            try:
+                if pending_tag is not None:
+                    self.last_ep = EP_IN
+                    pending_tag = None
+                    read(EP_IN, 13, 5000)
+                
+                tag = next(tags) & 0xFFFFFFFF
+                pack_tag(cbw, 4, tag)
+                self.last_ep = EP_OUT
+                write(EP_OUT, cbw)
+                pending_tag = tag
+                cmd_count += 1
+                
+                if log_every and cmd_count % log_every == 0:
+                    elapsed = now() - start_time
+                    logger.info("%s state: %d commands sent, elapsed: %.1fs", state_name, cmd_count, elapsed)
+                
+                # A slow command (a CSW read that ran into its timeout) pushes
+                # the schedule back instead of being made up with a burst
+                next_send = max(next_send + period, now())
+            except usb.core.USBError as e:
+                self.log("USB Error: %s", e)
+                if e.errno == errno.EPIPE or "Pipe error" in str(e):
+                    try:
+                        self.device.clear_halt(self.last_ep)
+                    except:
+                        self.log("Failed to clear halts")
+                next_send = max(next_send + period, now())
+            except Exception as e:
+                logger.warning("Error in %s state: %s", state_name, e)
+                next_send = now() + error_delay
+            
+            delay = next_send - now()
+            if delay > 0:
+                sleep(delay)
+        
+        # Hand the last CSW to reap_csw() so the next command collects it
+        self.pending_csw_tag = pending_tag
+        return cmd_count
+    
+    def _frame_producer(self, free_bufs, frame_queue, stop):
+        """
+        Queue (index, path, frame, buffer) tuples for Phase 4, followed by None.
+        
+        frame is the preloaded bytes when available, with buffer None.
+        Otherwise the file is read into an array taken from free_bufs, which
+        is both frame and buffer; the consumer hands it back through free_bufs
+        once the frame has been sent. frame is None if the file could not be
+        read.
+        """
+        try:
+            for i, frame_path in enumerate(self.frames):
+                if stop.is_set():
+                    break
+                
+                if self.frame_data:
+                    frame_queue.put((i, frame_path, self.frame_data[i], None))
+                    continue
+                
+                # Read straight into a reused array, which PyUSB hands to
+                # libusb without converting it
+                buf = free_bufs.get()
+                if stop.is_set():
+                    break
+                frame = None
+                try:
+                    with open(frame_path, 'rb') as f:
+                        size = os.fstat(f.fileno()).st_size
+                        if len(buf) != size:
+                            buf = array('B', bytes(size))
+                        if f.readinto(buf) == size:
+                            frame = buf
+                        else:
+                            logger.error(f"Error reading frame {i+1}: short read")
+                except OSError as e:
+                    logger.error(f"Error reading frame {i+1}: {e}")
+                frame_queue.put((i, frame_path, frame, buf))
+        finally:
+            frame_queue.put(None)
+    
+    def send_frame(self, index, frame_path, frame_data):
+        """Send one frame with the Display Image command."""
+        logger.info("Sending frame %d/%d: %s (%d bytes)",
+                    index + 1, len(self.frames), os.path.basename(frame_path), len(frame_data))
+        return self._send_out(DISPLAY_IMAGE_CMD, frame_data, retry_count=1, ignore_errors=True, max_delay=0.3)
+    
     def run_exact_sequence(self):
         """
         Run the exact sequence of commands observed in the Wireshark capture.
@@ -209,41 +471,19 @@ class ExactSequencer:
             # Phase 1: Initial animation state (0-55 seconds)
             # Just send TEST UNIT READY commands every 200ms for the first 55 seconds
             logger.info("Phase 1: Animation state (0-55 seconds)")
-            start_time = time.time()
+            start_time = time.monotonic()
             animation_end_time = start_time + 55
             
-            cmd_count = 0
-            while time.time() < animation_end_time:
-                try:
-                    cmd = bytes([0x00, 0x00, 0x00, 0x00, 0x00, 0x00])  # TEST UNIT READY
-                    _, csw = self.send_command(cmd, retry_count=1, ignore_errors=True)
-                    cmd_count += 1
-                    
-                    if cmd_count % 10 == 0:
-                        elapsed = time.time() - start_time
-                        logger.info(f"Animation state: {cmd_count} commands sent, elapsed: {elapsed:.1f}s")
-                    
-                    # Sleep 200ms between commands
-                    time.sleep(0.2)
-                except Exception as e:
-                    logger.warning(f"Error in Animation state: {e}")
-                    time.sleep(0.5)
+            self.tur_burst(animation_end_time, 0.2, "Animation", error_delay=0.5, log_every=10)
             
             # Phase 2: Connecting state (55-58 seconds)
             # Send TEST UNIT READY commands every 100ms for 3 seconds
             logger.info("Phase 2: Connecting state (55-58 seconds)")
             connecting_end_time = animation_end_time + 3
+            self.tur_burst(connecting_end_time, 0.1, "Connecting", error_delay=0.2)
             
-            while time.time() < connecting_end_time:
-                try:
-                    cmd = bytes([0x00, 0x00, 0x00, 0x00, 0x00, 0x00])  # TEST UNIT READY
-                    _, csw = self.send_command(cmd, retry_count=1, ignore_errors=True)
-                    
-                    # Sleep 100ms between commands
-                    time.sleep(0.1)
-                except Exception as e:
-                    logger.warning(f"Error in Connecting state: {e}")
-                    time.sleep(0.2)
+            # The last Phase 2 CSW is collected before the display is initialised
+            self.reap_csw()
             
             # Phase 3: Connected state - First, try to initialize the display
             logger.info("Phase 3: Connected state - Initializing display")
@@ -254,34 +494,28 @@ class ExactSequencer:
             # Send F5 01 (Initialize Display)
             try:
                 logger.info("Sending F5 01 (Initialize Display)")
-                cmd = bytes([0xF5, 0x01, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-                _, csw = self.send_command(cmd, retry_count=2, ignore_errors=True)
+                _, csw = self.send_command(INIT_DISPLAY_CMD, retry_count=2, ignore_errors=True)
                 
                 # Wait 500ms
                 time.sleep(0.5)
                 
                 # Send F5 20 (Set Mode)
                 logger.info("Sending F5 20 (Set Mode)")
-                cmd = bytes([0xF5, 0x20, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-                data = bytes([0x05, 0x00, 0x00, 0x00])
-                _, csw = self.send_command(cmd, data=data, retry_count=2, ignore_errors=True)
+                _, csw = self.send_command(SET_MODE_CMD, data=SET_MODE_DATA, retry_count=2, ignore_errors=True)
                 
                 # Wait 500ms
                 time.sleep(0.5)
                 
                 # Send F5 10 (Stop Animation)
                 logger.info("Sending F5 10 (Stop Animation)")
-                cmd = bytes([0xF5, 0x10, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-                data = bytes([0x00])
-                _, csw = self.send_command(cmd, data=data, retry_count=2, ignore_errors=True)
+                _, csw = self.send_command(STOP_ANIM_CMD, data=STOP_ANIM_DATA, retry_count=2, ignore_errors=True)
                 
                 # Wait 500ms
                 time.sleep(0.5)
                 
                 # Send F5 A0 (Clear Screen)
                 logger.info("Sending F5 A0 (Clear Screen)")
-                cmd = bytes([0xF5, 0xA0, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-                _, csw = self.send_command(cmd, retry_count=2, ignore_errors=True)
+                _, csw = self.send_command(CLEAR_SCREEN_CMD, retry_count=2, ignore_errors=True)
                 
                 # Wait 1 second
                 time.sleep(1)
@@ -293,35 +527,63 @@ class ExactSequencer:
             if self.frames:
                 logger.info(f"Phase 4: Sending {len(self.frames)} frames")
                 
-                # Alternate frame sizes pattern:
-                # Send frames in the exact alternating pattern seen in the captures
-                for i, frame_path in enumerate(self.frames):
-                    try:
-                        # Read frame data
-                        with open(frame_path, 'rb') as f:
-                            frame_data = f.read()
-                        
-                        # Send Display Image command
-                        logger.info(f"Sending frame {i+1}/{len(self.frames)}: {os.path.basename(frame_path)} ({len(frame_data)} bytes)")
-                        cmd = bytes([0xF5, 0xB0, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-                        _, csw = self.send_command(cmd, data=frame_data, retry_count=1, ignore_errors=True)
-                        
-                        # Wait between frames
-                        # Use a shorter delay for the first few frames
-                        if i < 3:
-                            time.sleep(0.2)
-                        else:
-                            time.sleep(0.5)
-                        
-                        # Send a TEST UNIT READY every 3 frames to maintain connection
-                        if i % 3 == 0:
-                            cmd = bytes([0x00, 0x00, 0x00, 0x00, 0x00, 0x00])  # TEST UNIT READY
-                            self.send_command(cmd, retry_count=1, ignore_errors=True)
+                # Frames are read from disk on a producer thread into one of two
+                # buffers while the other is on the bus; PyUSB drops the GIL
+                # during transfers, so the two genuinely overlap
+                free_bufs = queue.Queue()
+                for _ in range(2):
+                    free_bufs.put(array('B'))
+                frame_queue = queue.Queue(maxsize=2)
+                stop = threading.Event()
+                producer = threading.Thread(target=self._frame_producer,
+                                            args=(free_bufs, frame_queue, stop), daemon=True)
+                producer.start()
+                
+                try:
+                    # Alternate frame sizes pattern:
+                    # Send frames in the exact alternating pattern seen in the captures
+                    while True:
+                        item = frame_queue.get()
+                        if item is None:
+                            break
+                        i, frame_path, frame, buf = item
                         
-                    except Exception as e:
-                        logger.error(f"Error sending frame {i+1}: {e}")
-                        # Continue with next frame
-                        continue
+                        try:
+                            try:
+                                if frame is None:
+                                    continue
+                                self.send_frame(i, frame_path, frame)
+                            finally:
+                                # The buffer can take the next frame read
+                                if buf is not None:
+                                    free_bufs.put(buf)
+                            
+                            # Wait between frames
+                            # Use a shorter delay for the first few frames
+                            if i < 3:
+                                time.sleep(0.2)
+                            else:
+                                time.sleep(0.5)
+                            
+                            # Send a TEST UNIT READY every 3 frames to maintain connection
+                            if i % 3 == 0:
+                                self._send_no_data(TUR_CMD, retry_count=1, ignore_errors=True)
+                            
+                        except Exception as e:
+                            logger.error(f"Error sending frame {i+1}: {e}")
+                            # Continue with next frame
+                            continue
+                finally:
+                    stop.set()
+                    # Unblock the producer, whether it waits for a buffer or
+                    # for room in the queue
+                    free_bufs.put(array('B'))
+                    while producer.is_alive():
+                        try:
+                            frame_queue.get(timeout=0.1)
+                        except queue.Empty:
+                            pass
+                    producer.join()
             
             logger.info("Sequence completed successfully")
             
@@ -335,6 +597,9 @@ class ExactSequencer:
         """Close the connection to the device."""
         if self.device:
             try:
+                # Leave the device with no outstanding status phase
+                self.reap_csw()
+                
                 # Release all resources
                 usb.util.dispose_resources(self.device)
                 logger.info("Device connection closed")
@@ -347,12 +612,13 @@ def main():
     parser = argparse.ArgumentParser(description='ALi LCD Device Exact Sequence Replicator')
     parser.add_argument('frames_dir', help='Directory containing frame binary files')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--no-preload', action='store_true', help='Read frames from disk during replay instead of preloading them')
     args = parser.parse_args()
     
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
-    sequencer = ExactSequencer(args.frames_dir, args.verbose)
+    sequencer = ExactSequencer(args.frames_dir, args.verbose, preload=not args.no_preload)
     sequencer.run_exact_sequence()
 
 if __name__ == '__main__':
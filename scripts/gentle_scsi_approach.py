@@ -9,16 +9,20 @@ import usb.core
 import usb.util
 import time
 import logging
+import logging.handlers
+import queue
 import struct
 import sys
 import argparse
+import errno
 from datetime import datetime
-import random
+import os
 import threading
+from array import array
 
 # Configure logging
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout)
@@ -33,6 +37,20 @@ PRODUCT_ID = 0x3922
 EP_OUT = 0x02
 EP_IN = 0x81
 TIMEOUT = 1000  # 1 second
+CSW_SIGNATURE = 0x53425355  # "USBS" in little-endian
+CSW_STRUCT = struct.Struct('<IIIB')
+TAG_STRUCT = struct.Struct('<I')
+
+# Adaptive pre-command pacing: waits start near zero, double on a failed
+# command and halve again on success
+BACKOFF_MIN = 0.005
+
+# maintain_connection polling
+ANIMATION_POLL_INTERVAL = 3.0  # Fixed, so the animation state sees enough commands to end
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 10.0
+CONNECTED_KEEPALIVE = 4.0  # Idle time before polling a connected device
+TUR_BATCH_SIZE = 2  # TEST UNIT READYs pipelined per poll when connected
 
 # SCSI Commands
 TEST_UNIT_READY_CMD = b'\x00\x00\x00\x00\x00\x00'
@@ -47,34 +65,79 @@ F5_GET_STATUS = b'\xF5\x30\x00\x00\x00\x00'
 F5_CLEAR_SCREEN = b'\xF5\xA0\x00\x00\x00\x00'
 F5_DISPLAY_IMAGE = b'\xF5\xB0\x00\x00\x00\x00'
 
+def build_cbw_template(command, transfer_length, direction_flag, lun, cmd_length):
+    """Build a 31-byte CBW with a zero tag, to be patched in at offset 4"""
+    cbw = bytearray(31)
+    struct.pack_into('<4sIIBBB', cbw, 0, b'USBC', 0, transfer_length, direction_flag, lun, cmd_length)
+    command = command[:cmd_length]
+    cbw[15:15 + len(command)] = command
+    return bytes(cbw)
+
+# Complete CBWs keyed by (command, transfer length, direction flag, LUN,
+# command length); only the tag differs between sends. Seeded with the fixed
+# commands this script sends, and extended on first use of any other command.
+CBW_TEMPLATES = {
+    key: build_cbw_template(*key) for key in (
+        (TEST_UNIT_READY_CMD, 0, 0x00, 0, 6),
+        (INQUIRY_CMD, 36, 0x80, 0, 6),
+        (REQUEST_SENSE_CMD, 18, 0x80, 0, 6),
+        (F5_INITIALIZE_DISPLAY, 0, 0x00, 0, 6),
+        (F5_ANIMATION_CONTROL, 1, 0x00, 0, 6),
+        (F5_SET_MODE, 4, 0x00, 0, 6),
+        (F5_GET_STATUS, 8, 0x80, 0, 6),
+        (F5_CLEAR_SCREEN, 0, 0x00, 0, 6),
+    )
+}
+
 # Device States
 STATE_ANIMATION = "ANIMATION"
 STATE_CONNECTING = "CONNECTING"
 STATE_CONNECTED = "CONNECTED"
 STATE_DISCONNECTED = "DISCONNECTED"
 
+def initial_tag():
+    """Random non-zero starting tag; after that tags simply count up"""
+    return int.from_bytes(os.urandom(4), 'little') | 1
+
 class DeviceDisconnectedError(Exception):
     """Raised when the device has been disconnected."""
     pass
 
+def is_disconnect_error(e):
+    """True if a transfer error means the device has gone away"""
+    if isinstance(e, usb.core.USBError) and e.errno is not None:
+        return e.errno in (errno.ENODEV, errno.ESHUTDOWN)
+    # Backends that don't report an errno only leave the message to go on
+    message = str(e).lower()
+    return "no such device" in message or "device disconnected" in message
+
+def is_pipe_error(e):
+    """True if a transfer error is an endpoint stall (halt)"""
+    if isinstance(e, usb.core.USBError) and e.errno is not None:
+        return e.errno == errno.EPIPE
+    return "pipe" in str(e).lower()
+
 class ALiLCDDevice:
+    OUT_CHUNK = 1 << 20  # Bulk OUT transfer size for large payloads
+    COALESCE_MAX = 4096  # Largest data-out phase sent in the same write as its CBW
+
     def __init__(self, vendor_id, product_id):
         self.vendor_id = vendor_id
         self.product_id = product_id
         self.device = None
         self.connected = False
         self.consecutive_failures = 0
-        self.max_retries = 3  # Lower retry count to prevent excessive attempts
-        self.retry_delays = [1, 2, 3]  # Longer delays between retries
-        self.command_tag = random.randint(1, 0xFFFFFFFF)  # Random initial tag
+        self.max_retries = 2  # Only a stalled endpoint is retried, once, after clearing the halt
+        self.command_tag = initial_tag()  # Random initial tag
         self.current_state = STATE_ANIMATION
-        self.state_start_time = time.time()
+        self.state_start_time = time.monotonic()
         self.command_count = 0
-        self.last_command_time = time.time()
-        self.reconnect_lock = threading.Lock()
-        self.reconnect_in_progress = False
+        self.last_command_time = time.monotonic()
+        self.reconnect_lock = threading.Lock()  # Guards only the test-and-set below
+        self.reconnecting = threading.Event()
         
-        # State-specific timing - much longer delays overall
+        # State-specific timing - upper bound of the adaptive pre-command wait,
+        # reached only while commands keep failing
         self.command_delays = {
             STATE_ANIMATION: 1.0,      # Longer delays in animation state
             STATE_CONNECTING: 0.8,     # Moderate delays in connecting
@@ -82,6 +145,22 @@ class ALiLCDDevice:
             STATE_DISCONNECTED: 2.0    # Long delays when disconnected
         }
         
+        # Current adaptive wait before each command, per state
+        self.command_backoff = dict.fromkeys(self.command_delays, BACKOFF_MIN)
+        
+        # Transfer buffers reused by every command, so pyusb neither allocates
+        # a CBW nor a result array per call. They are arrays because pyusb
+        # hands an array to libusb as is and copies anything else. A CBW with
+        # a small data-out phase goes out from a buffer of exactly that length,
+        # kept per length in _out_bufs.
+        self._cbw_buf = array('B', bytes(31))
+        self._cbw_view = memoryview(self._cbw_buf)
+        self._out_bufs = {}
+        self.coalesce_out = True  # Cleared once the device stalls a combined write
+        self._csw_buf = array('B', bytes(13))
+        self._read_bufs = {size: array('B', bytes(size)) for size in (36, 18, 8)}
+        self._chunk_buf = None  # Full chunks of large payloads, allocated on first use
+        
         # Tag validation strictness by state
         self.tag_validation = {
             STATE_ANIMATION: False,    # Ignore tag mismatches in animation
@@ -135,7 +214,7 @@ class ALiLCDDevice:
                 
             self.connected = True
             self.current_state = STATE_ANIMATION
-            self.state_start_time = time.time()
+            self.state_start_time = time.monotonic()
             self.command_count = 0
             self.consecutive_failures = 0
             logger.info("USB device connected and interface claimed")
@@ -162,11 +241,11 @@ class ALiLCDDevice:
     def reconnect(self):
         """Try to reconnect to the device"""
         with self.reconnect_lock:
-            if self.reconnect_in_progress:
+            if self.reconnecting.is_set():
                 logger.debug("Reconnect already in progress, skipping")
                 return False
                 
-            self.reconnect_in_progress = True
+            self.reconnecting.set()
             
         try:
             logger.info("Attempting to reconnect to the device...")
@@ -183,9 +262,9 @@ class ALiLCDDevice:
             if success:
                 logger.info("Successfully reconnected to the device!")
                 # Reset tag counter and state
-                self.command_tag = random.randint(1, 0xFFFFFFFF)
+                self.command_tag = initial_tag()
                 self.current_state = STATE_ANIMATION
-                self.state_start_time = time.time()
+                self.state_start_time = time.monotonic()
                 self.command_count = 0
                 self.consecutive_failures = 0
             else:
@@ -194,50 +273,107 @@ class ALiLCDDevice:
             return success
             
         finally:
-            with self.reconnect_lock:
-                self.reconnect_in_progress = False
+            self.reconnecting.clear()
 
-    def write(self, endpoint, data, timeout=TIMEOUT):
-        """Write data to an endpoint with retry logic"""
+    def write(self, endpoint, data, timeout=TIMEOUT, retry=True):
+        """Write data to an endpoint with retry logic; retry=False makes a single attempt"""
         if not self.connected or self.device is None:
             logger.error("Cannot write: Device not connected")
             return 0
             
-        for attempt in range(self.max_retries):
+        attempts = self.max_retries if retry else 1
+        for attempt in range(attempts):
             try:
-                logger.debug(f"Writing {len(data)} bytes to EP_OUT")
+                logger.debug("Writing %d bytes to EP_OUT", len(data))
                 bytes_written = self.device.write(endpoint, data, timeout=timeout)
-                logger.debug(f"Successfully wrote {bytes_written} bytes")
+                logger.debug("Successfully wrote %d bytes", bytes_written)
                 self.consecutive_failures = 0
                 return bytes_written
             except Exception as e:
                 self.consecutive_failures += 1
-                logger.warning(f"USB Error on write attempt {attempt+1}/{self.max_retries}: {str(e)}")
+                logger.warning(f"USB Error on write attempt {attempt+1}/{attempts}: {str(e)}")
                 
-                if "no such device" in str(e).lower() or "device disconnected" in str(e).lower():
+                if is_disconnect_error(e):
                     logger.warning("Device disconnected during write")
                     self.connected = False
                     raise DeviceDisconnectedError("Device disconnected during write")
+                
+                # libusb already retries at the URB level; only a halted
+                # endpoint is worth another attempt, straight after clearing it
+                if not is_pipe_error(e) or attempt == self.max_retries - 1:
+                    break
+                try:
+                    logger.debug("Clearing halt on endpoint 0x%02x", endpoint)
+                    self.device.clear_halt(endpoint)
+                except Exception as clear_e:
+                    logger.warning(f"Failed to clear halt: {str(clear_e)}")
+                    break
                     
-                if attempt < self.max_retries - 1:
-                    delay = self.retry_delays[min(attempt, len(self.retry_delays)-1)]
-                    logger.debug(f"Retrying write in {delay} seconds...")
-                    time.sleep(delay)
-                    
-        logger.error("Failed to write to device after multiple attempts")
+        logger.error("Failed to write to device")
         return 0
 
-    def read(self, endpoint, length, timeout=TIMEOUT):
-        """Read data from an endpoint with retry logic"""
+    def write_bulk_large(self, data, timeout=TIMEOUT):
+        """Write a large payload to EP_OUT in OUT_CHUNK-sized transfers.
+        
+        libusb performs best when handed buffers in the megabyte range, so the
+        payload goes out in 1 MiB writes instead of many small ones. pyusb
+        passes an array through untouched but copies a memoryview element by
+        element, so each chunk is first copied with one memcpy into an array
+        (a reused one for full chunks). Returns the total number of bytes
+        written, or 0 if any chunk failed.
+        """
+        size = len(data)
+        if isinstance(data, array) and size <= self.OUT_CHUNK:
+            return self.write(EP_OUT, data, timeout=timeout)
+        
+        total = 0
+        with memoryview(data) as mv:
+            for offset in range(0, size, self.OUT_CHUNK):
+                piece = mv[offset:offset + self.OUT_CHUNK]
+                if len(piece) == self.OUT_CHUNK:
+                    if self._chunk_buf is None:
+                        self._chunk_buf = array('B', bytes(self.OUT_CHUNK))
+                    chunk = self._chunk_buf
+                    with memoryview(chunk) as view:
+                        view[:] = piece
+                else:
+                    chunk = array('B')
+                    chunk.frombytes(piece)
+                piece.release()
+                written = self.write(EP_OUT, chunk, timeout=timeout)
+                if written == 0:
+                    return 0
+                total += written
+        return total
+
+    def write_cbw_and_data(self, data_out, timeout=TIMEOUT):
+        """Write the prepared CBW, then data_out in its own transfers.
+        
+        Returns the number of data bytes written, or 0 if either write failed.
+        """
+        if self.write(EP_OUT, self._cbw_buf, timeout=timeout) == 0:
+            return 0
+        return self.write_bulk_large(data_out, timeout=timeout)
+
+    def read(self, endpoint, length, timeout=TIMEOUT, buffer=None):
+        """Read data from an endpoint with retry logic.
+        
+        If buffer is given (an array of at least length bytes) pyusb reads
+        into it in place and a memoryview of the received bytes is returned;
+        it is only valid until the buffer is next used.
+        """
         if not self.connected or self.device is None:
             logger.error("Cannot read: Device not connected")
             return None
             
         for attempt in range(self.max_retries):
             try:
-                logger.debug(f"Reading {length} bytes from EP_IN")
-                data = self.device.read(endpoint, length, timeout=timeout)
-                logger.debug(f"Successfully read {len(data)} bytes")
+                logger.debug("Reading %d bytes from EP_IN", length)
+                if buffer is None:
+                    data = self.device.read(endpoint, length, timeout=timeout)
+                else:
+                    data = memoryview(buffer)[:self.device.read(endpoint, buffer, timeout=timeout)]
+                logger.debug("Successfully read %d bytes", len(data))
                 self.consecutive_failures = 0
                 return data
             except usb.core.USBTimeoutError:
@@ -247,30 +383,28 @@ class ALiLCDDevice:
                 self.consecutive_failures += 1
                 logger.warning(f"USB Error on read attempt {attempt+1}/{self.max_retries}: {str(e)}")
                 
-                if "no such device" in str(e).lower() or "device disconnected" in str(e).lower():
+                if is_disconnect_error(e):
                     logger.warning("Device disconnected during read")
                     self.connected = False
                     raise DeviceDisconnectedError("Device disconnected during read")
                 
-                # Clear halt on endpoint for pipe errors
-                if "pipe" in str(e).lower():
-                    try:
-                        logger.debug(f"Clearing halt on endpoint 0x{endpoint:02x}")
-                        self.device.clear_halt(endpoint)
-                    except Exception as clear_e:
-                        logger.warning(f"Failed to clear halt: {str(clear_e)}")
-                    
-                if attempt < self.max_retries - 1:
-                    delay = self.retry_delays[min(attempt, len(self.retry_delays)-1)]
-                    logger.debug(f"Retrying read in {delay} seconds...")
-                    time.sleep(delay)
+                # Only a halted endpoint is retried, straight after clearing it;
+                # anything else fails fast
+                if not is_pipe_error(e) or attempt == self.max_retries - 1:
+                    break
+                try:
+                    logger.debug("Clearing halt on endpoint 0x%02x", endpoint)
+                    self.device.clear_halt(endpoint)
+                except Exception as clear_e:
+                    logger.warning(f"Failed to clear halt: {str(clear_e)}")
+                    break
                     
-        logger.error("Failed to read from device after multiple attempts")
+        logger.error("Failed to read from device")
         return None
 
     def update_state(self):
         """Update the device state based on time and command count"""
-        current_time = time.time()
+        current_time = time.monotonic()
         time_in_state = current_time - self.state_start_time
         time_since_last_command = current_time - self.last_command_time
         
@@ -308,25 +442,38 @@ class ALiLCDDevice:
 
     def send_command(self, command, expected_data_length=0, cmd_length=None, lun=0, timeout=TIMEOUT, data_out=None):
         """Send a command with state-aware behavior and optional outgoing data"""
+        # Send the command, with any outgoing data in the same transfer
+        return self._run_command(lambda: self.send_scsi_command(command, expected_data_length, cmd_length, lun,
+                                                                timeout, data_out=data_out))
+
+    def send_command_batch(self, commands, lun=0, timeout=TIMEOUT):
+        """Send several status-only commands in one round trip with state-aware behavior.
+        
+        Returns (status, statuses): status is 0 only if every command passed.
+        """
+        return self._run_command(lambda: self.send_scsi_batch(commands, lun, timeout))
+
+    def _run_command(self, send):
+        """Pacing, metrics and disconnect handling shared by the send_command variants"""
         # Update state before sending command
         self.update_state()
         
-        # Apply state-specific command delay
-        time.sleep(self.command_delays[self.current_state])
+        # Apply the adaptive state-specific command delay
+        state = self.current_state
+        time.sleep(self.command_backoff[state])
         
         try:
-            # Send the command
-            status, data = self.send_scsi_command(command, expected_data_length, cmd_length, lun, timeout)
+            status, data = send()
             
-            # If we have outgoing data after the command, send it
-            if data_out is not None and status is not None:
-                # Add a small delay before sending data
-                time.sleep(0.2)
-                self.write(EP_OUT, data_out, timeout=timeout)
+            if status == 0:
+                self.command_backoff[state] = max(BACKOFF_MIN, self.command_backoff[state] * 0.5)
+            else:
+                self.command_backoff[state] = min(self.command_delays[state],
+                                                  self.command_backoff[state] * 2)
             
             # Update command metrics
             self.command_count += 1
-            self.last_command_time = time.time()
+            self.last_command_time = time.monotonic()
             
             return status, data
             
@@ -338,8 +485,18 @@ class ALiLCDDevice:
                 logger.error("Failed to reconnect device")
             return None, None
 
-    def send_scsi_command(self, command, expected_data_length=0, cmd_length=None, lun=0, timeout=TIMEOUT):
-        """Send a SCSI command and handle response with state-aware tag handling"""
+    def send_scsi_command(self, command, expected_data_length=0, cmd_length=None, lun=0, timeout=TIMEOUT,
+                          data_out=None):
+        """Send a SCSI command and handle response with state-aware tag handling.
+        
+        data_out, if given and no larger than COALESCE_MAX, is appended to the
+        CBW and sent in the same bulk write, one URB instead of two. That is
+        not the same on the wire: the data shares the CBW's packet, where
+        bulk-only transport expects the CBW as a 31-byte packet of its own,
+        so it relies on the firmware tolerating it. If the combined write
+        fails, CBW and data are written separately, and once that works
+        every later command writes them separately too.
+        """
         
         # If command length not specified, use actual length up to 16 bytes max
         if cmd_length is None:
@@ -347,64 +504,77 @@ class ALiLCDDevice:
         
         # Construct the Command Block Wrapper (CBW)
         direction_flag = 0x80 if expected_data_length > 0 else 0x00
+        transfer_length = len(data_out) if data_out else expected_data_length
         
         # Generate a command tag - using incremental tag by default
         tag = self.command_tag
         self.command_tag = (self.command_tag + 1) & 0xFFFFFFFF
         
-        cbw = struct.pack('<4sIIBBB', 
-                          b'USBC',          # CBW signature
-                          tag,              # Command tag
-                          expected_data_length,  # Data transfer length
-                          direction_flag,   # Direction flag
-                          lun,              # LUN
-                          cmd_length)       # Command length
-        
-        # Add command, ensuring it's the right length
-        if len(command) < cmd_length:
-            command = command + b'\x00' * (cmd_length - len(command))
-        elif len(command) > cmd_length:
-            command = command[:cmd_length]
-        
-        cbw += command
-        
-        # Ensure the CBW is 31 bytes total
-        padding_needed = 31 - len(cbw)
-        if padding_needed > 0:
-            cbw += b'\x00' * padding_needed
+        # Copy the prebuilt CBW for this command and patch in the tag; a
+        # command seen for the first time gets its template built and cached
+        key = (command, transfer_length, direction_flag, lun, cmd_length)
+        template = CBW_TEMPLATES.get(key)
+        if template is None:
+            template = CBW_TEMPLATES[key] = build_cbw_template(*key)
+        self._cbw_view[:] = template
+        TAG_STRUCT.pack_into(self._cbw_buf, 4, tag)
             
-        logger.debug(f"Sending CBW: {cbw.hex()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending CBW: %s", self._cbw_view.hex())
         
-        # Write Command Block Wrapper (CBW)
-        bytes_written = self.write(EP_OUT, cbw, timeout=timeout)
+        # Write Command Block Wrapper (CBW) and any data-out phase. Large
+        # payloads (image data) follow the CBW in their own big transfers
+        # rather than being copied onto it.
+        if data_out and (len(data_out) > self.COALESCE_MAX or not self.coalesce_out):
+            bytes_written = self.write_cbw_and_data(data_out, timeout)
+        elif data_out:
+            # Place the data straight after the CBW; nothing is concatenated
+            packet_length = 31 + len(data_out)
+            packet = self._out_bufs.get(packet_length)
+            if packet is None:
+                packet = self._out_bufs[packet_length] = array('B', bytes(packet_length))
+            with memoryview(packet) as out:
+                out[:31] = self._cbw_view
+                out[31:] = data_out
+            bytes_written = self.write(EP_OUT, packet, timeout=timeout, retry=False)
+            if bytes_written == 0 and self.connected:
+                logger.warning("Combined CBW and data write failed, sending them separately")
+                try:
+                    self.device.clear_halt(EP_OUT)
+                except Exception as clear_e:
+                    logger.warning(f"Failed to clear halt: {str(clear_e)}")
+                bytes_written = self.write_cbw_and_data(data_out, timeout)
+                if bytes_written:
+                    self.coalesce_out = False
+        else:
+            bytes_written = self.write(EP_OUT, self._cbw_buf, timeout=timeout)
         if bytes_written == 0:
             logger.warning("Failed to send command")
             return None, None
         
-        # Read data if expected
+        # Read data if expected. The IN phases follow the CBW with no wait in
+        # front: a blocking read completes as soon as the device answers
         data = None
         if expected_data_length > 0:
-            # Add a small delay before reading data - helps with timing issues
-            time.sleep(0.2)
-            data = self.read(EP_IN, expected_data_length, timeout=timeout)
+            data = self.read(EP_IN, expected_data_length, timeout=timeout,
+                             buffer=self._read_bufs.get(expected_data_length))
             if data is None:
                 logger.warning(f"Failed to read {expected_data_length} bytes of data")
         
-        # Add a small delay before reading CSW - helps with timing issues
-        time.sleep(0.2)
-        
         # Read Command Status Wrapper (CSW) - 13 bytes
-        csw = self.read(EP_IN, 13, timeout=timeout)
+        csw = self.read(EP_IN, 13, timeout=timeout, buffer=self._csw_buf)
         if csw is None:
             logger.warning("Failed to read CSW")
             return None, data
         
         # Parse CSW
-        if len(csw) == 13:
-            signature, returned_tag, residue, status = struct.unpack('<4sIIB', csw)
+        if len(csw) >= 13:
+            # Unpack straight from the read buffer; the signature is compared
+            # as an integer so no slice is allocated
+            signature, returned_tag, residue, status = CSW_STRUCT.unpack_from(csw)
             
-            if signature != b'USBS':
-                logger.warning(f"Invalid CSW signature: {signature}")
+            if signature != CSW_SIGNATURE:
+                logger.warning(f"Invalid CSW signature: 0x{signature:08x}")
                 
             # Check tag based on state-specific validation rules
             if self.tag_validation[self.current_state] and returned_tag != tag:
@@ -415,11 +585,11 @@ class ALiLCDDevice:
             else:
                 # Log but don't treat as error in animation/connecting states
                 if returned_tag != tag:
-                    logger.debug(f"Tag mismatch (allowed in {self.current_state}): expected {tag}, got {returned_tag}")
+                    logger.debug("Tag mismatch (allowed in %s): expected %d, got %d", self.current_state, tag, returned_tag)
                     self.command_tag = returned_tag + 1  # Sync with device
             
             if status == 0:
-                logger.debug(f"Command successful, status: {status}")
+                logger.debug("Command successful, status: %d", status)
             else:
                 logger.warning(f"Command failed with status {status}")
                 
@@ -428,6 +598,69 @@ class ALiLCDDevice:
             logger.warning(f"Received CSW with incorrect length: {len(csw)}")
             return None, data
 
+    def send_scsi_batch(self, commands, lun=0, timeout=TIMEOUT):
+        """Pipeline status-only SCSI commands (no data phase, e.g. TEST UNIT READY).
+        
+        All CBWs go out back to back in a single bulk write and their CSWs are
+        then read together, so N commands cost one round trip instead of N.
+        Commands with a data phase cannot be batched, since their data would
+        interleave with the other commands' CSWs. Returns (status, statuses)
+        where statuses holds one CSW status per command (None if its CSW never
+        arrived) and status is the first non-zero one, or 0 if all passed.
+        """
+        count = len(commands)
+        packet = bytearray(31 * count)
+        tags = []
+        for i, command in enumerate(commands):
+            cmd_length = min(len(command), 16)
+            key = (command, 0, 0x00, lun, cmd_length)
+            template = CBW_TEMPLATES.get(key)
+            if template is None:
+                template = CBW_TEMPLATES[key] = build_cbw_template(*key)
+            tag = self.command_tag
+            self.command_tag = (self.command_tag + 1) & 0xFFFFFFFF
+            packet[31 * i:31 * (i + 1)] = template
+            TAG_STRUCT.pack_into(packet, 31 * i + 4, tag)
+            tags.append(tag)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending %d pipelined CBWs: %s", count, packet.hex())
+        
+        if self.write(EP_OUT, packet, timeout=timeout) == 0:
+            logger.warning("Failed to send command batch")
+            return None, [None] * count
+        
+        # Each CSW is a short packet and so may end the transfer on its own;
+        # keep reading until every expected CSW has arrived
+        buffer = self._read_bufs.get(13 * count)
+        if buffer is None:
+            buffer = self._read_bufs[13 * count] = array('B', bytes(13 * count))
+        statuses = []
+        while len(statuses) < count:
+            data = self.read(EP_IN, 13 * (count - len(statuses)), timeout=timeout, buffer=buffer)
+            if data is None or len(data) < 13:
+                logger.warning("Failed to read CSW %d of %d", len(statuses) + 1, count)
+                break
+            for offset in range(0, len(data) - 12, 13):
+                if len(statuses) == count:
+                    break
+                signature, returned_tag, residue, status = CSW_STRUCT.unpack_from(data, offset)
+                if signature != CSW_SIGNATURE:
+                    logger.warning(f"Invalid CSW signature: 0x{signature:08x}")
+                expected_tag = tags[len(statuses)]
+                if returned_tag != expected_tag:
+                    logger.debug("Batch tag mismatch: expected %d, got %d", expected_tag, returned_tag)
+                    self.command_tag = returned_tag + 1  # Sync with device
+                statuses.append(status)
+        
+        statuses.extend([None] * (count - len(statuses)))
+        status = next((st for st in statuses if st != 0), 0)
+        if status == 0:
+            logger.debug("Batch of %d commands successful", count)
+        else:
+            logger.warning(f"Command batch failed, statuses: {statuses}")
+        return status, statuses
+
     def test_unit_ready(self):
         """Send TEST UNIT READY command with state-aware retry logic"""
         status, _ = self.send_command(TEST_UNIT_READY_CMD)
@@ -435,14 +668,22 @@ class ALiLCDDevice:
             return False
         return status == 0
 
+    def test_unit_ready_batch(self, count=2):
+        """Send count TEST UNIT READY commands pipelined in one round trip"""
+        status, _ = self.send_command_batch([TEST_UNIT_READY_CMD] * count)
+        return status == 0
+
     def inquiry(self):
         """Send INQUIRY command and parse response"""
         status, data = self.send_command(INQUIRY_CMD, expected_data_length=36)
         
         if status == 0 and data is not None:
-            vendor = data[8:16].tobytes().decode('ascii', errors='replace').strip()
-            product = data[16:32].tobytes().decode('ascii', errors='replace').strip()
-            revision = data[32:36].tobytes().decode('ascii', errors='replace').strip()
+            # Decode straight from slices of a view rather than copying the
+            # whole response for each field
+            mv = memoryview(data)
+            vendor = bytes(mv[8:16]).decode('ascii', errors='replace').strip()
+            product = bytes(mv[16:32]).decode('ascii', errors='replace').strip()
+            revision = bytes(mv[32:36]).decode('ascii', errors='replace').strip()
             
             logger.info(f"Device info - Vendor: {vendor}, Product: {product}, Revision: {revision}")
             return True
@@ -470,8 +711,6 @@ class ALiLCDDevice:
         logger.info("Sending Initialize Display command (F5 01)")
         # Use a much longer timeout for this critical command
         status, _ = self.send_command(F5_INITIALIZE_DISPLAY, cmd_length=6, timeout=5000)
-        # Extra delay after initialization
-        time.sleep(2)
         return status == 0
 
     def stop_animation(self):
@@ -494,7 +733,9 @@ class ALiLCDDevice:
         status, data = self.send_command(F5_GET_STATUS, expected_data_length=8, cmd_length=6)
         
         if status == 0 and data is not None:
-            logger.info(f"Status data: {data.tobytes().hex()}")
+            data = bytes(data)  # Copy out of the shared read buffer
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Status data: %s", data.hex())
             return True, data
         else:
             logger.warning("Get Status command failed or no data received")
@@ -506,23 +747,43 @@ class ALiLCDDevice:
         status, _ = self.send_command(F5_CLEAR_SCREEN, cmd_length=6)
         return status == 0
 
+    def display_image(self, image_data):
+        """Send F5 B0 command with raw frame data to display an image"""
+        logger.info(f"Sending Display Image command (F5 B0), {len(image_data)} bytes")
+        status, _ = self.send_command(F5_DISPLAY_IMAGE, cmd_length=6, data_out=image_data)
+        return status == 0
+
 def maintain_connection(device, duration=60):
     """Maintain connection to the device for a specified duration"""
     logger.info(f"Maintaining connection for {duration} seconds...")
     
-    start_time = time.time()
-    poll_interval = 3  # Poll every 3 seconds - longer interval
+    start_time = time.monotonic()
+    # Outside the animation state the poll interval starts at 3 seconds,
+    # stretches while the device keeps answering and drops back to 1 second
+    # after a failure
+    poll_interval = ANIMATION_POLL_INTERVAL
     
     success_count = 0
     failure_count = 0
     
-    while time.time() - start_time < duration:
+    while time.monotonic() - start_time < duration:
         # Update state
         current_state = device.update_state()
         
-        # Always send TEST UNIT READY to keep the connection alive
+        # A connected device only drops out after 5 seconds without commands,
+        # so there is no need to poll it until it has been idle for a while
+        if (current_state == STATE_CONNECTED and
+                time.monotonic() - device.last_command_time < CONNECTED_KEEPALIVE):
+            time.sleep(0.5)
+            continue
+        
+        # Send TEST UNIT READY to keep the connection alive; a connected
+        # device gets a pipelined pair in a single round trip
         try:
-            status = device.test_unit_ready()
+            if current_state == STATE_CONNECTED:
+                status = device.test_unit_ready_batch(TUR_BATCH_SIZE)
+            else:
+                status = device.test_unit_ready()
             
             if status:
                 success_count += 1
@@ -535,8 +796,16 @@ def maintain_connection(device, duration=60):
                     # Try to get device status
                     device.get_status()
                     
-                # Delay between commands - longer in all states
-                time.sleep(poll_interval)
+                # The animation state only ends after more than 50 commands
+                # (see update_state), so it keeps the fixed interval. Other
+                # states back off further while the device is healthy, staying
+                # under the keep-alive threshold so a connected device is never
+                # left idle long enough to drop
+                if current_state == STATE_ANIMATION:
+                    time.sleep(ANIMATION_POLL_INTERVAL)
+                else:
+                    poll_interval = min(MAX_POLL_INTERVAL, poll_interval * 1.3)
+                    time.sleep(min(poll_interval, CONNECTED_KEEPALIVE))
             else:
                 failure_count += 1
                 logger.warning(f"TEST UNIT READY failed ({success_count} successes, {failure_count} failures)")
@@ -544,8 +813,12 @@ def maintain_connection(device, duration=60):
                 # Request sense to get error information
                 device.request_sense()
                 
-                # Adjust delay based on failure count
-                time.sleep(poll_interval)
+                # Poll again soon after a failure
+                poll_interval = MIN_POLL_INTERVAL
+                if current_state == STATE_ANIMATION:
+                    time.sleep(ANIMATION_POLL_INTERVAL)
+                else:
+                    time.sleep(poll_interval)
         
         except DeviceDisconnectedError:
             logger.warning("Device disconnected, attempting to reconnect...")
@@ -596,16 +869,10 @@ def perform_captured_sequence(device):
         # If TEST UNIT READY fails, get sense data
         device.request_sense()
     
-    # Extra delay between initialization steps
-    time.sleep(2)
-    
     # Step 3: Test Initialization with 6-byte F5 command
     logger.info("Step 3: Initialization command (F5 01) - 6 bytes")
     init_success = device.initialize_display()
     
-    # Extra delay after initialization
-    time.sleep(3)
-    
     # Step 4: More TEST UNIT READY commands to maintain connection
     for i in range(3):
         logger.info(f"Step 4.{i+1}: TEST UNIT READY command")
@@ -616,14 +883,10 @@ def perform_captured_sequence(device):
     logger.info("Step 5: REQUEST SENSE command")
     device.request_sense()
     
-    time.sleep(2)
-    
     # Step 6: Try to get status
     logger.info("Step 6: GET STATUS command (F5 30)")
     status_success, _ = device.get_status()
     
-    time.sleep(2)
-    
     # Step 7: More TEST UNIT READY commands
     for i in range(2):
         logger.info(f"Step 7.{i+1}: TEST UNIT READY command")
@@ -634,8 +897,6 @@ def perform_captured_sequence(device):
     logger.info("Step 8: SET MODE command (F5 20)")
     mode_success = device.set_mode()
     
-    time.sleep(2)
-    
     # Step 9: More TEST UNIT READY commands
     for i in range(2):
         logger.info(f"Step 9.{i+1}: TEST UNIT READY command")
@@ -646,8 +907,6 @@ def perform_captured_sequence(device):
     logger.info("Step 10: STOP ANIMATION command (F5 10 00)")
     anim_success = device.stop_animation()
     
-    time.sleep(2)
-    
     # Step 11: More TEST UNIT READY commands
     for i in range(2):
         logger.info(f"Step 11.{i+1}: TEST UNIT READY command")
@@ -671,15 +930,48 @@ def main():
                         help='Only perform the captured command sequence, then exit')
     parser.add_argument('--log-file', type=str,
                         help='Log to file in addition to console')
+    parser.add_argument('--debug', action='store_true',
+                        help='Enable debug logging of every USB transfer')
     
     args = parser.parse_args()
     
+    if args.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+    
+    listener = start_log_listener(args.log_file)
+    try:
+        return run(args)
+    finally:
+        # Flush everything still queued before exiting
+        listener.stop()
+
+def start_log_listener(log_file=None):
+    """Move console (and optional file) logging onto a background thread.
+    
+    The root logger's handlers are replaced by a QueueHandler, and a
+    QueueListener writes the records out, so the USB command path never blocks
+    on stdout or disk. Returns the started listener; call stop() on exit.
+    """
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    
     # Setup file logging if requested
-    if args.log_file:
-        file_handler = logging.FileHandler(args.log_file)
+    if log_file:
+        file_handler = logging.FileHandler(log_file)
         file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    log_queue = queue.Queue(-1)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
     
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+def run(args):
+    """Connect, run the captured sequence and keep the connection alive"""
     logger.info("ALi LCD Display Gentle SCSI Communication Tool")
     logger.info(f"Starting at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
@@ -16,7 +16,8 @@ import time
 import logging
 import struct
 import sys
-import argparse
+import errno
+from array import array
 from datetime import datetime
 
 # Configure logging
@@ -37,19 +38,70 @@ EP_OUT = 0x02
 EP_IN = 0x81
 TIMEOUT = 1000  # 1 second
 
-# SCSI Commands
-TEST_UNIT_READY_CMD = b'\x00\x00\x00\x00\x00\x00'
-CMD_F5_01 = b'\xF5\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
-CMD_F5_20 = b'\xF5\x20\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
-CMD_F5_25 = b'\xF5\x25\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
-CMD_F5_37 = b'\xF5\x37\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+# Readiness polling after connect, in place of fixed settle times
+RESET_POLL_ATTEMPTS = 20  # x 0.1 s waiting for the device to re-enumerate
+READY_POLL_ATTEMPTS = 20  # x 0.05 s of TEST_UNIT_READY until it answers
 
-# USB device state tracking
-successful_commands = 0
-total_commands = 0
-max_consecutive_failures = 0
-current_consecutive_failures = 0
-last_csw_status = None
+# Retry sleep budget per transfer during stabilization, in seconds
+STABILIZE_MAX_WAIT = 0.2
+
+# Minimum stabilization time before --fast-stabilize may end it early
+FAST_STABILIZE_TIME = 2.0
+CBW_STRUCT = struct.Struct('<4sIIBBB')  # CBW header; the 16-byte command follows
+TAG_STRUCT = struct.Struct('<I')
+CSW_STRUCT = struct.Struct('<4sIIB')
+
+# Real command block length of each padded command below, for the CBW
+CDB_LENGTHS = {}
+
+def _pad16(command):
+    """Pad a command block to the 16-byte CBW field once, at import time"""
+    padded = command.ljust(16, b'\x00')
+    CDB_LENGTHS[padded] = len(command)
+    return padded
+
+# SCSI Commands, already padded to 16 bytes
+TEST_UNIT_READY_CMD = _pad16(b'\x00\x00\x00\x00\x00\x00')
+CMD_F5_01 = _pad16(b'\xF5\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')
+CMD_F5_20 = _pad16(b'\xF5\x20\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')
+CMD_F5_25 = _pad16(b'\xF5\x25\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')
+CMD_F5_37 = _pad16(b'\xF5\x37\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')
+
+def build_cbw_template(command):
+    """Build the 31-byte CBW of a no-data command with a zero tag, patched in at offset 4"""
+    return CBW_STRUCT.pack(b'USBC', 0, 0, 0x00, 0, CDB_LENGTHS.get(command, 16)) + command
+
+# Complete CBWs for the no-data commands above; only the tag changes per send
+CBW_TEMPLATES = {command: build_cbw_template(command) for command in CDB_LENGTHS}
+
+def is_disconnect_error(e):
+    """True if a transfer error means the device has gone away"""
+    if isinstance(e, usb.core.USBError) and e.errno is not None:
+        return e.errno in (errno.ENODEV, errno.ESHUTDOWN)
+    # Backends that don't report an errno only leave the message to go on
+    message = str(e).lower()
+    return "no such device" in message or "device disconnected" in message
+
+def is_pipe_error(e):
+    """True if a transfer error is an endpoint stall (halt)"""
+    if isinstance(e, usb.core.USBError) and e.errno is not None:
+        return e.errno == errno.EPIPE
+    return "pipe" in str(e).lower()
+
+def is_transient_error(e):
+    """True if a transfer error may clear up by itself, so waiting and retrying is worthwhile"""
+    if isinstance(e, usb.core.USBError) and e.errno is not None:
+        return e.errno in (errno.EAGAIN, errno.EIO, errno.ETIMEDOUT)
+    return True
+
+class CommandStats:
+    """SCSI command counters of one USBDevice"""
+    __slots__ = ('successful', 'total', 'last_status')
+    
+    def __init__(self):
+        self.successful = 0
+        self.total = 0
+        self.last_status = None
 
 class USBDevice:
     def __init__(self, vendor_id, product_id):
@@ -60,6 +112,17 @@ class USBDevice:
         self.consecutive_failures = 0
         self.max_retries = 5
         self.retry_delays = [0.5, 1, 2, 4, 8]  # Exponential backoff
+        self.pending_tags = []  # Tags of sent commands whose CSW is still unread
+        self.stats = CommandStats()
+        
+        # CBW and CSW buffers reused by every command rather than allocated
+        # per call. Both are arrays: pyusb hands an array to libusb as is,
+        # where any other buffer is first converted into a new one, and it
+        # reads the CSW straight into the array. The CBW is filled through
+        # a memoryview, which takes bytes slices.
+        self._cbw = array('B', bytes(31))
+        self._cbw_view = memoryview(self._cbw)
+        self._csw = array('B', bytes(13))
 
     def connect(self):
         """Connect to the USB device and claim interface"""
@@ -83,10 +146,17 @@ class USBDevice:
             except Exception as e:
                 logger.warning(f"Kernel driver handling error: {str(e)}")
             
-            # Reset the device
+            # Reset the device, then wait only until it is back on the bus
             try:
                 self.device.reset()
-                time.sleep(2)  # Give the device time to reset
+                for _ in range(RESET_POLL_ATTEMPTS):
+                    time.sleep(0.1)
+                    device = usb.core.find(idVendor=self.vendor_id, idProduct=self.product_id)
+                    if device is not None:
+                        self.device = device
+                        break
+                else:
+                    logger.warning("Device did not reappear after reset")
             except Exception as e:
                 logger.warning(f"Could not reset device: {str(e)}")
             
@@ -104,6 +174,9 @@ class USBDevice:
                 
             self.connected = True
             logger.info("USB device connected and interface claimed")
+            
+            if not self.wait_until_ready():
+                logger.warning("Device not answering TEST_UNIT_READY yet, continuing")
             return True
             
         except Exception as e:
@@ -111,6 +184,15 @@ class USBDevice:
             self.connected = False
             return False
 
+    def wait_until_ready(self, attempts=READY_POLL_ATTEMPTS, delay=0.05):
+        """Send TEST_UNIT_READY until the device answers, instead of sleeping a fixed time"""
+        for _ in range(attempts):
+            status, _ = send_scsi_command(self, TEST_UNIT_READY_CMD)
+            if status == 0 or not self.connected:
+                return status == 0
+            time.sleep(delay)
+        return False
+
     def disconnect(self):
         """Disconnect from the USB device"""
         if self.device:
@@ -123,47 +205,78 @@ class USBDevice:
         self.connected = False
         logger.info("Disconnected from USB device")
 
-    def write(self, endpoint, data, timeout=TIMEOUT):
-        """Write data to an endpoint with retry logic"""
+    def write(self, endpoint, data, timeout=TIMEOUT, max_wait=None):
+        """Write data to an endpoint with retry logic.
+        
+        max_wait caps the total time (s) slept between retries; a retry whose
+        delay would exceed it is not attempted.
+        """
         if not self.connected or self.device is None:
             logger.error("Cannot write: Device not connected")
             return 0
             
+        total_slept = 0
         for attempt in range(self.max_retries):
             try:
-                logger.debug(f"Writing {len(data)} bytes directly to EP_OUT")
+                logger.debug("Writing %d bytes directly to EP_OUT", len(data))
                 bytes_written = self.device.write(endpoint, data, timeout=timeout)
-                logger.debug(f"Successfully wrote {bytes_written} bytes")
+                logger.debug("Successfully wrote %d bytes", bytes_written)
                 self.consecutive_failures = 0
                 return bytes_written
             except Exception as e:
                 self.consecutive_failures += 1
-                logger.warning(f"USB Error on write attempt {attempt+1}/{self.max_retries}: {str(e)}")
+                logger.warning("USB Error on write attempt %d/%d: %s", attempt + 1, self.max_retries, e)
                 
-                if "no such device" in str(e).lower() or "device disconnected" in str(e).lower():
+                if is_disconnect_error(e):
                     logger.warning("Device disconnected")
                     self.connected = False
                     return 0
                     
-                if attempt < self.max_retries - 1:
+                if attempt == self.max_retries - 1:
+                    break
+                if is_pipe_error(e):
+                    # A halted endpoint is usable again as soon as the halt is
+                    # cleared, so retry straight away
+                    try:
+                        logger.debug("Clearing halt on endpoint 0x%02x", endpoint)
+                        self.device.clear_halt(endpoint)
+                    except Exception as clear_e:
+                        logger.warning("Failed to clear halt: %s", clear_e)
+                        break
+                elif is_transient_error(e):
                     delay = self.retry_delays[min(attempt, len(self.retry_delays)-1)]
-                    logger.debug(f"Retrying write in {delay} seconds...")
+                    if max_wait is not None and total_slept + delay > max_wait:
+                        break
+                    logger.debug("Retrying write in %s seconds...", delay)
                     time.sleep(delay)
+                    total_slept += delay
+                else:
+                    break
                     
         logger.error("Failed to write to device after multiple attempts")
         return 0
 
-    def read(self, endpoint, length, timeout=TIMEOUT):
-        """Read data from an endpoint with retry logic"""
+    def read(self, endpoint, length, timeout=TIMEOUT, buffer=None, max_wait=None):
+        """Read data from an endpoint with retry logic.
+        
+        If buffer is given (an array of length bytes) pyusb reads into it in
+        place and a memoryview of the received bytes is returned; it is only
+        valid until the buffer is next used. max_wait caps the total retry
+        sleep as for write().
+        """
         if not self.connected or self.device is None:
             logger.error("Cannot read: Device not connected")
             return None
             
+        total_slept = 0
         for attempt in range(self.max_retries):
             try:
-                logger.debug(f"Reading {length} bytes directly from EP_IN")
-                data = self.device.read(endpoint, length, timeout=timeout)
-                logger.debug(f"Successfully read {len(data)} bytes")
+                logger.debug("Reading %d bytes directly from EP_IN", length)
+                if buffer is None:
+                    data = self.device.read(endpoint, length, timeout=timeout)
+                else:
+                    data = memoryview(buffer)[:self.device.read(endpoint, buffer, timeout=timeout)]
+                logger.debug("Successfully read %d bytes", len(data))
                 self.consecutive_failures = 0
                 return data
             except usb.core.USBTimeoutError:
@@ -171,26 +284,51 @@ class USBDevice:
                 return None
             except Exception as e:
                 self.consecutive_failures += 1
-                logger.warning(f"USB Error on read attempt {attempt+1}/{self.max_retries}: {str(e)}")
+                logger.warning("USB Error on read attempt %d/%d: %s", attempt + 1, self.max_retries, e)
                 
-                if "no such device" in str(e).lower() or "device disconnected" in str(e).lower():
+                if is_disconnect_error(e):
                     logger.warning("Device disconnected")
                     self.connected = False
                     return None
                     
-                if attempt < self.max_retries - 1:
+                if attempt == self.max_retries - 1:
+                    break
+                if is_pipe_error(e):
+                    # A halted endpoint is usable again as soon as the halt is
+                    # cleared, so retry straight away
+                    try:
+                        logger.debug("Clearing halt on endpoint 0x%02x", endpoint)
+                        self.device.clear_halt(endpoint)
+                    except Exception as clear_e:
+                        logger.warning("Failed to clear halt: %s", clear_e)
+                        break
+                elif is_transient_error(e):
                     delay = self.retry_delays[min(attempt, len(self.retry_delays)-1)]
-                    logger.debug(f"Retrying read in {delay} seconds...")
+                    if max_wait is not None and total_slept + delay > max_wait:
+                        break
+                    logger.debug("Retrying read in %s seconds...", delay)
                     time.sleep(delay)
+                    total_slept += delay
+                else:
+                    break
                     
         logger.error("Failed to read from device after multiple attempts")
         return None
 
-def send_scsi_command(device, command, expected_data_length=0):
-    """Send a SCSI command and handle response"""
-    global total_commands, successful_commands, last_csw_status
+def send_scsi_command(device, command, expected_data_length=0, timeout=TIMEOUT, max_wait=None, out_data=None):
+    """Send a SCSI command and handle response; timeout (ms) applies to the CSW read.
     
-    total_commands += 1
+    max_wait caps the retry sleeps of each transfer (see USBDevice.write).
+    out_data, if given, is the command's data-out phase and is sent in the
+    same bulk write as the CBW.
+    """
+    stats = device.stats
+    
+    # Bulk-only transport needs every earlier CSW read before the next CBW
+    if device.pending_tags:
+        reap_csws(device, max_wait=max_wait)
+    
+    stats.total += 1
     
     # Construct the Command Block Wrapper (CBW)
     # CBW format:
@@ -206,24 +344,37 @@ def send_scsi_command(device, command, expected_data_length=0):
     direction_flag = 0x80 if expected_data_length > 0 else 0x00
     
     # Generate a command tag
-    tag = total_commands & 0xFFFFFFFF
-    
-    cbw = struct.pack('<4sIIBBB', 
-                      b'USBC', 
-                      tag, 
-                      expected_data_length, 
-                      direction_flag, 
-                      0,  # LUN always 0
-                      len(command))
-    
-    # Pad command to 16 bytes if needed
-    if len(command) < 16:
-        command = command + b'\x00' * (16 - len(command))
-    
-    cbw += command
-    
-    # Write Command Block Wrapper (CBW)
-    bytes_written = device.write(EP_OUT, cbw)
+    tag = stats.total & 0xFFFFFFFF
+    
+    cbw = device._cbw
+    template = CBW_TEMPLATES.get(command) if expected_data_length == 0 and not out_data else None
+    if template is not None:
+        # Everything but the tag is fixed for a known no-data command
+        device._cbw_view[:] = template
+        TAG_STRUCT.pack_into(cbw, 4, tag)
+    else:
+        CBW_STRUCT.pack_into(cbw, 0,
+                             b'USBC', 
+                             tag, 
+                             len(out_data) if out_data else expected_data_length, 
+                             direction_flag, 
+                             0,  # LUN always 0
+                             CDB_LENGTHS.get(command, 16))
+        
+        # Commands are padded to 16 bytes at import time; anything else would
+        # shift the CBW out of shape, so reject it even when run with -O
+        if len(command) != 16:
+            raise ValueError(f"Command must be padded to 16 bytes, got {len(command)}")
+        device._cbw_view[15:31] = command
+    
+    # Write Command Block Wrapper (CBW), followed directly by any data-out
+    # phase so both travel in one bulk transfer
+    if out_data:
+        packet = array('B', cbw)
+        packet.frombytes(out_data)
+        bytes_written = device.write(EP_OUT, packet, max_wait=max_wait)
+    else:
+        bytes_written = device.write(EP_OUT, cbw, max_wait=max_wait)
     if bytes_written == 0:
         logger.warning("Failed to send command")
         return None, None
@@ -231,93 +382,187 @@ def send_scsi_command(device, command, expected_data_length=0):
     # Read data if expected
     data = None
     if expected_data_length > 0:
-        data = device.read(EP_IN, expected_data_length)
+        data = device.read(EP_IN, expected_data_length, max_wait=max_wait)
         if data is None:
-            logger.warning(f"Failed to read {expected_data_length} bytes of data")
+            logger.warning("Failed to read %d bytes of data", expected_data_length)
     
     # Read Command Status Wrapper (CSW)
-    csw = device.read(EP_IN, 13)
+    csw = device.read(EP_IN, 13, timeout=timeout, buffer=device._csw, max_wait=max_wait)
     if csw is None:
         logger.warning("Failed to read CSW")
         return None, data
     
-    # Parse CSW
+    return parse_csw(device, csw, tag), data
+
+def send_scsi_batch(device, command, count, max_wait=None, defer=False):
+    """Send count copies of a no-data command with all their CBWs in one bulk write.
+    
+    Each CSW is a short packet that ends its own transfer, so they are still
+    read one by one, in order. Returns the list of CSW statuses, with None for
+    any command whose CSW could not be read. With defer=True the CSWs are left
+    for reap_csws() and only a failed write is reported (as a list of None).
+    """
+    stats = device.stats
+    
+    if device.pending_tags:
+        reap_csws(device, max_wait=max_wait)
+    
+    template = CBW_TEMPLATES[command]
+    packet = array('B', bytes(31 * count))
+    view = memoryview(packet)
+    tags = []
+    for i in range(count):
+        stats.total += 1
+        tag = stats.total & 0xFFFFFFFF
+        view[31 * i:31 * (i + 1)] = template
+        TAG_STRUCT.pack_into(packet, 31 * i + 4, tag)
+        tags.append(tag)
+    
+    bytes_written = device.write(EP_OUT, packet, max_wait=max_wait)
+    if bytes_written == 0:
+        logger.warning("Failed to send command batch")
+        return [None] * count
+    
+    device.pending_tags = tags
+    if defer:
+        return []
+    return reap_csws(device, max_wait=max_wait)
+
+def reap_csws(device, max_wait=None):
+    """Read the CSWs of commands sent with deferred status, in order.
+    
+    Returns their statuses, with None for any CSW that could not be read.
+    """
+    tags, device.pending_tags = device.pending_tags, []
+    statuses = []
+    for tag in tags:
+        csw = device.read(EP_IN, 13, buffer=device._csw, max_wait=max_wait)
+        if csw is None:
+            logger.warning("Failed to read CSW")
+            break
+        statuses.append(parse_csw(device, csw, tag))
+    statuses.extend([None] * (len(tags) - len(statuses)))
+    return statuses
+
+def parse_csw(device, csw, tag):
+    """Check a Command Status Wrapper (CSW) against its command's tag and return the status"""
     if len(csw) == 13:
-        signature, returned_tag, residue, status = struct.unpack('<4sIIB', csw)
+        # Unpack straight from the read buffer, without copying it to bytes
+        signature, returned_tag, residue, status = CSW_STRUCT.unpack_from(csw, 0)
         
         if signature != b'USBS':
-            logger.warning(f"Invalid CSW signature: {signature}")
+            logger.warning("Invalid CSW signature: %s", signature)
             
         if returned_tag != tag:
-            logger.warning(f"CSW tag mismatch: expected {tag}, got {returned_tag}")
+            logger.warning("CSW tag mismatch: expected %d, got %d", tag, returned_tag)
             
-        last_csw_status = status
+        device.stats.last_status = status
         
         if status == 0:
-            successful_commands += 1
-            logger.debug(f"Command successful, status: {status}")
+            device.stats.successful += 1
+            logger.debug("Command successful, status: %d", status)
         else:
-            logger.warning(f"Command failed with status {status}")
+            logger.warning("Command failed with status %d", status)
             
-        return status, data
+        return status
     else:
-        logger.warning(f"Received CSW with incorrect length: {len(csw)}")
-        return None, data
+        logger.warning("Received CSW with incorrect length: %d", len(csw))
+        return None
 
-def device_stabilization(device, duration=90, interval=0.5):
+def device_stabilization(device, duration=90, interval=0.5, batch=2, fast=False):
     """
     Send TEST_UNIT_READY commands for a specified duration to stabilize the connection.
     
     Args:
         device: USB device object
         duration: Duration in seconds to run stabilization
-        interval: Time between commands in seconds
+        interval: Time between commands in seconds; a batch goes out every
+            batch * interval, so the device sees the same command rate, and
+            the success target takes as long to reach, whatever the batch size
+        batch: Number of TEST_UNIT_READY commands sent per bulk write
+        fast: Accept a shorter run of successes if no command has failed yet
     """
-    global successful_commands, total_commands
+    stats = device.stats
     
-    start_time = time.time()
+    start_time = time.monotonic()
     end_time = start_time + duration
     successful_count = 0
     needed_success_count = 10  # Need to see at least 10 successful commands in a row
+    fast_success_count = 3  # ...or, with fast, 3 after FAST_STABILIZE_TIME without any failure
     
     logger.info(f"Starting device stabilization phase ({duration} seconds)...")
     
     # Reset counters
-    successful_commands = 0
-    total_commands = 0
+    stats.successful = 0
+    stats.total = 0
     
     consecutive_successes = 0
+    errors_seen = False
     last_log_time = start_time
+    next_send = start_time
+    slot = interval * batch  # One batch per slot keeps one command per interval
+    
+    def record(statuses):
+        """Count results towards the stability target; True once it is reached"""
+        nonlocal consecutive_successes, errors_seen
+        for status in statuses:
+            if status == 0:
+                consecutive_successes += 1
+                if consecutive_successes >= needed_success_count:
+                    return True
+                if (fast and not errors_seen and consecutive_successes >= fast_success_count and
+                        elapsed >= FAST_STABILIZE_TIME):
+                    return True
+            else:
+                consecutive_successes = 0
+                errors_seen = True
+        return False
     
-    while time.time() < end_time:
-        elapsed = time.time() - start_time
-        remaining = end_time - time.time()
+    while True:
+        # Read the clock once per iteration
+        now = time.monotonic()
+        if now >= end_time:
+            break
+        elapsed = now - start_time
+        remaining = end_time - now
         
         # Log progress every ~5 seconds
-        if time.time() - last_log_time >= 5:
-            success_rate = (successful_commands / max(total_commands, 1)) * 100
-            logger.info(f"Stabilization progress: {elapsed:.1f}s elapsed, {remaining:.1f}s remaining, "
-                       f"{consecutive_successes}/{needed_success_count} successful")
-            last_log_time = time.time()
+        if logger.isEnabledFor(logging.INFO) and now - last_log_time >= 5:
+            success_rate = (stats.successful / max(stats.total, 1)) * 100
+            logger.info("Stabilization progress: %.1fs elapsed, %.1fs remaining, %d/%d successful, "
+                        "%.1f%% success rate", elapsed, remaining, consecutive_successes, needed_success_count,
+                        success_rate)
+            last_log_time = now
         
-        # Send TEST_UNIT_READY command
-        status, _ = send_scsi_command(device, TEST_UNIT_READY_CMD)
+        # The previous batch's CSWs were left queued on the device over the
+        # interval; they are collected now, just before the next CBWs go out.
+        # Failures are not retried with long back-off sleeps, since the
+        # schedule below already paces the next attempt.
+        if record(reap_csws(device, max_wait=STABILIZE_MAX_WAIT)):
+            logger.info("Device appears stable after %.1f seconds", elapsed)
+            return True
         
-        if status == 0:
-            consecutive_successes += 1
-            if consecutive_successes >= needed_success_count:
-                logger.info(f"Device appears stable after {elapsed:.1f} seconds")
-                return True
-        else:
-            consecutive_successes = 0
+        # Send a pipelined batch of TEST_UNIT_READY commands
+        record(send_scsi_batch(device, TEST_UNIT_READY_CMD, batch, max_wait=STABILIZE_MAX_WAIT, defer=True))
         
-        time.sleep(interval)
+        # Commands go out on a fixed schedule, so the blocking CBW/CSW round
+        # trip is absorbed into the interval rather than added on top of it
+        next_send += slot
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_send -= delay  # Running late: restart the schedule from now
+    
+    # Collect the last batch's CSWs
+    record(reap_csws(device, max_wait=STABILIZE_MAX_WAIT))
     
     # Check if we achieved stability
-    success_rate = (successful_commands / max(total_commands, 1)) * 100
-    logger.info(f"Stabilization complete: {total_commands} commands sent, {success_rate:.1f}% success rate")
+    success_rate = (stats.successful / max(stats.total, 1)) * 100
+    logger.info(f"Stabilization complete: {stats.total} commands sent, {success_rate:.1f}% success rate")
     
-    if consecutive_successes >= needed_success_count:
+    if consecutive_successes >= needed_success_count or (
+            fast and not errors_seen and consecutive_successes >= fast_success_count):
         logger.info("Device appears stable")
         return True
     else:
@@ -342,34 +587,37 @@ def send_f5_command(device, cmd, cmd_name, wait_time=3):
     logger.info(f"Waiting {wait_time} seconds for device to process {cmd_name} command...")
     time.sleep(wait_time)
     
-    # Verify device is still responsive
-    verify_status, _ = send_scsi_command(device, TEST_UNIT_READY_CMD)
-    if verify_status is None:
-        logger.warning(f"Device not responsive after {cmd_name} command")
-        return False
+    # A CSW already proves the device is responsive; probe it separately
+    # only after a transport failure
+    if status is None:
+        verify_status, _ = send_scsi_command(device, TEST_UNIT_READY_CMD)
+        if verify_status is None:
+            logger.warning(f"Device not responsive after {cmd_name} command")
     
     return status == 0
 
 def wait_for_mode_change(device, wait_time=5, check_interval=0.5):
     """Wait for the device to change modes and stabilize"""
-    logger.info(f"Waiting {wait_time} seconds for mode change to take effect...")
-    
-    # Wait a bit first
-    time.sleep(2)
-    
-    # Then periodically check if device is still responsive
-    end_time = time.time() + wait_time
-    while time.time() < end_time:
-        status, _ = send_scsi_command(device, TEST_UNIT_READY_CMD)
+    logger.info(f"Waiting up to {wait_time} seconds for mode change to take effect...")
+    
+    # The first TEST_UNIT_READY is given the whole wait as its CSW timeout, so
+    # if the device goes quiet while switching, the read completes the moment
+    # it answers again. A device that is not ready yet still answers at once,
+    # just with a non-zero status, so keep polling
+    # every check_interval until it reports ready or the wait runs out. The
+    # deadline keeps the extra 2 s the device used to be given to settle.
+    end_time = time.monotonic() + wait_time + 2
+    status, _ = send_scsi_command(device, TEST_UNIT_READY_CMD, timeout=int(wait_time * 1000))
+    
+    while status != 0 and time.monotonic() < end_time:
         if status is None:
             logger.warning("Device not responding during mode change")
-        elif status != 0:
-            logger.warning(f"Device returned non-zero status during mode change: {status}")
-        
+        else:
+            logger.warning("Device returned non-zero status during mode change: %d", status)
         time.sleep(check_interval)
+        status, _ = send_scsi_command(device, TEST_UNIT_READY_CMD)
     
-    # Final check
-    status, _ = send_scsi_command(device, TEST_UNIT_READY_CMD)
+    # The last TEST_UNIT_READY above is the final check
     if status == 0:
         logger.info("Device is responsive after mode change")
         return True
@@ -377,16 +625,64 @@ def wait_for_mode_change(device, wait_time=5, check_interval=0.5):
         logger.warning("Device may not be stable after mode change")
         return False
 
+USAGE = """usage: gentler_usb_approach.py [-h] [--stabilize-time N] [--fast-stabilize] [--test-only]
+                               [--log-file PATH]
+
+ALi LCD Display Communication Tool
+
+options:
+  -h, --help            show this help message and exit
+  --stabilize-time N    Maximum time in seconds to stabilize connection before sending
+                        commands (ends early once the device is stable; default: 90)
+  --fast-stabilize      End stabilization after a short clean run of successes
+  --test-only           Only test connection, do not send any F5 commands
+  --log-file PATH       Log to file in addition to console
+"""
+
+class Args:
+    """Parsed command line options"""
+    def __init__(self):
+        self.stabilize_time = 90
+        self.fast_stabilize = False
+        self.test_only = False
+        self.log_file = None
+
+def parse_args(argv):
+    """Parse the few options this tool takes by hand; argparse costs more to import than to use here"""
+    args = Args()
+    flags = {'--fast-stabilize': 'fast_stabilize', '--test-only': 'test_only'}
+    values = {'--stabilize-time': ('stabilize_time', int), '--log-file': ('log_file', str)}
+    
+    argv = list(argv)
+    while argv:
+        arg = argv.pop(0)
+        option, has_value, value = arg.partition('=')
+        if arg in ('-h', '--help'):
+            sys.stdout.write(USAGE)
+            sys.exit(0)
+        elif option in flags and not has_value:
+            setattr(args, flags[option], True)
+        elif option in values:
+            if not has_value:
+                if not argv:
+                    usage_error(f"argument {option}: expected one argument")
+                value = argv.pop(0)
+            name, convert = values[option]
+            try:
+                setattr(args, name, convert(value))
+            except ValueError:
+                usage_error(f"argument {option}: invalid {convert.__name__} value: '{value}'")
+        else:
+            usage_error(f"unrecognized arguments: {arg}")
+    return args
+
+def usage_error(message):
+    """Report a command line error the way argparse does and exit with status 2"""
+    sys.stderr.write(USAGE.split('\n\n')[0] + f"\ngentler_usb_approach.py: error: {message}\n")
+    sys.exit(2)
+
 def main():
-    parser = argparse.ArgumentParser(description='ALi LCD Display Communication Tool')
-    parser.add_argument('--stabilize-time', type=int, default=90, 
-                        help='Time in seconds to stabilize connection before sending commands')
-    parser.add_argument('--test-only', action='store_true',
-                        help='Only test connection, do not send any F5 commands')
-    parser.add_argument('--log-file', type=str,
-                        help='Log to file in addition to console')
-    
-    args = parser.parse_args()
+    args = parse_args(sys.argv[1:])
     
     # Setup file logging if requested
     if args.log_file:
@@ -405,7 +701,7 @@ def main():
     
     try:
         # Stabilization phase
-        stable = device_stabilization(device, duration=args.stabilize_time)
+        stable = device_stabilization(device, duration=args.stabilize_time, fast=args.fast_stabilize)
         if not stable and not args.test_only:
             logger.warning("Device stabilization incomplete, continuing anyway")
         
@@ -417,10 +713,6 @@ def main():
         # First phase: Send F5 01 (Initialize Display)
         logger.info("Sending enhanced initialization sequence...")
         
-        # Allow extra time after stabilization
-        logger.info("Waiting 3 more seconds to ensure device is ready...")
-        time.sleep(3)
-        
         # Send F5 01 command with extended wait time
         if not send_f5_command(device, CMD_F5_01, "F5 01 command (Initialize Display)", wait_time=5):
             logger.error("Failed to initialize display (F5 01)")
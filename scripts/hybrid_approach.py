@@ -8,10 +8,14 @@ exact_sequence.py, with improved error handling and recovery mechanisms.
 
 import os
 import sys
+import errno
 import time
 import struct
 import argparse
 import logging
+import queue
+import threading
+from array import array
 from typing import Optional, Tuple, Dict, List, Any
 import usb.core
 import usb.util
@@ -31,27 +35,96 @@ EP_OUT = 0x02
 EP_IN = 0x81
 CBW_SIGNATURE = 0x43425355  # "USBC" in little-endian
 CSW_SIGNATURE = 0x53425355  # "USBS" in little-endian
+OUT_CHUNK_SIZE = 1 << 20  # Largest single bulk OUT transfer
+TUR_BATCH_SIZE = 2  # TEST UNIT READY commands per batched write in the animation phase
+
+# Precompiled CBW header (the command block starts at offset 15, over the
+# trailing pad byte) and CSW layouts
+_CBW = struct.Struct('<IIIBBBB')
+_CSW = struct.Struct('<IIIB')
+_TAG = struct.Struct('<I')
+
+# Command blocks, built once
+_CMD_TUR = bytes(6)
+_CMD_INQUIRY = bytes([0x12, 0x00, 0x00, 0x00, 36, 0x00])
+_CMD_F5_01 = bytes.fromhex('F501' + '00' * 10)  # Initialize Display
+_CMD_F5_20 = bytes.fromhex('F520' + '00' * 10)  # Set Mode
+_CMD_F5_10 = bytes.fromhex('F510' + '00' * 10)  # Stop Animation
+_CMD_F5_A0 = bytes.fromhex('F5A0' + '00' * 10)  # Clear Screen
+_CMD_F5_B0 = bytes.fromhex('F5B0' + '00' * 10)  # Display Image
+
+# Display initialization: (label, description, command, data-out, delay after)
+_INIT_SEQ = (
+    ('F5 01', 'Initialize Display', _CMD_F5_01, None, 1.0),
+    ('F5 20', 'Set Mode', _CMD_F5_20, bytes([0x05, 0x00, 0x00, 0x00]), 1.0),
+    ('F5 10', 'Stop Animation', _CMD_F5_10, bytes([0x00]), 1.0),
+    ('F5 A0', 'Clear Screen', _CMD_F5_A0, None, 2.0),
+)
+
+# INQUIRY command blocks by allocation length
+_INQUIRY_CMDS = {36: _CMD_INQUIRY}
+
+# CBWs with a zero tag, keyed by (command, data length, direction in)
+_CBW_TEMPLATES = {}
+
+def _build_cbw_template(cmd, data_len, direction_in):
+    """Build the CBW for a command, leaving the tag zero."""
+    cbw = bytearray(31)
+    _CBW.pack_into(cbw, 0,
+                   CBW_SIGNATURE,                  # dCBWSignature
+                   0,                              # dCBWTag, patched per command
+                   data_len,                       # dCBWDataTransferLength
+                   0x80 if direction_in else 0x00, # bmCBWFlags
+                   0,                              # bCBWLUN
+                   len(cmd),                       # bCBWCBLength
+                   0)                              # overwritten by the command block
+    cbw[15:15 + len(cmd)] = cmd
+    return bytes(cbw)
+
+def is_disconnect_error(e):
+    """True if a transfer error means the device has gone away"""
+    if e.errno is not None:
+        return e.errno in (errno.ENODEV, errno.ESHUTDOWN)
+    # Backends that don't report an errno only leave the message to go on
+    return "No such device" in str(e)
+
+def is_pipe_error(e):
+    """True if a transfer error is an endpoint stall (halt)"""
+    if e.errno is not None:
+        return e.errno == errno.EPIPE
+    return "Pipe error" in str(e)
 
 class DeviceLifecycleState:
-    ANIMATION = "Animation"
-    CONNECTING = "Connecting"
-    CONNECTED = "Connected"
+    ANIMATION = 0
+    CONNECTING = 1
+    CONNECTED = 2
+
+# Display names for logging, indexed by state
+STATE_NAMES = ("Animation", "Connecting", "Connected")
 
 class HybridApproach:
-    def __init__(self, frames_dir=None, verbose=False):
+    def __init__(self, frames_dir=None, verbose=False, out_chunk_size=OUT_CHUNK_SIZE):
         """Initialize the class with optional frame directory."""
         self.device = None
         self.frames_dir = frames_dir
         self.frames = []
         self.verbose = verbose
         self.tag = 1
+        self._cbw_buf = bytearray(31)  # Reused by every CBW
+        self._out_buf = array('B')  # CBW followed by its data-out phase
+        self._csw_buf = array('B', bytes(13))  # pyusb reads in place into an array
+        self._batch_buf = array('B')  # Back-to-back CBWs for batch_tur
+        self._batch_tur = True  # Cleared once batching fails, see batch_tur
+        self._batch_tur_ok = False  # Set once a whole batch has gone through
+        self._ep_out = None  # Bulk endpoints, found in connect
+        self._ep_in = None
+        self._pending_csws = 0  # CSWs of tur_no_wait commands not read yet
+        self._tur_no_wait = True  # Cleared once the device stalls a deferred CSW
+        self.out_chunk_size = out_chunk_size
         self.state = DeviceLifecycleState.ANIMATION
         self.command_count = 0
-        self.state_transition_times = {
-            DeviceLifecycleState.ANIMATION: 0,
-            DeviceLifecycleState.CONNECTING: 0,
-            DeviceLifecycleState.CONNECTED: 0
-        }
+        self._log_ticks = 5  # Animation loop iterations until the next progress message
+        self._ts = [0.0, 0.0, 0.0]  # Time each state was entered, indexed by state
         
         if frames_dir and os.path.exists(frames_dir):
             self.load_frames(frames_dir)
@@ -66,14 +139,14 @@ class HybridApproach:
     def load_frames(self, directory):
         """Load binary frames from the specified directory."""
         self.log(f"Loading frames from {directory}")
-        files = [f for f in os.listdir(directory) if f.endswith('.bin')]
-        files.sort()  # Sort to ensure consistent order
+        # scandir gives each entry's path and a cached stat in one pass
+        with os.scandir(directory) as it:
+            entries = [(e.name, e.path, e.stat().st_size) for e in it if e.name.endswith('.bin')]
+        entries.sort()  # Sort to ensure consistent order
         
-        for file in files:
-            filepath = os.path.join(directory, file)
-            size = os.path.getsize(filepath)
+        for file, filepath, size in entries:
             self.log(f"Found frame: {file} ({size} bytes)")
-            self.frames.append(filepath)
+            self.frames.append((file, filepath, size))
     
     def connect(self):
         """Connect to the ALi LCD device with robust error handling."""
@@ -92,6 +165,7 @@ class HybridApproach:
                     continue
                 
                 self.log(f"Device found: {self.device}")
+                self._pending_csws = 0
                 
                 # Detach kernel driver if active
                 for config in self.device:
@@ -122,9 +196,16 @@ class HybridApproach:
                     self.log(f"Warning: Failed to claim interface: {e}", logging.WARNING)
                     # Try to continue anyway
                 
+                # Look the bulk endpoints up once; transfers through the
+                # endpoint objects skip pyusb's per-call address lookup
+                self._ep_out = usb.util.find_descriptor(interface, bEndpointAddress=EP_OUT)
+                self._ep_in = usb.util.find_descriptor(interface, bEndpointAddress=EP_IN)
+                if self._ep_out is None or self._ep_in is None:
+                    raise usb.core.USBError("Bulk endpoints not found on interface 0")
+                
                 self.log("Device connected successfully")
                 self.state = DeviceLifecycleState.ANIMATION
-                self.state_transition_times[DeviceLifecycleState.ANIMATION] = time.time()
+                self._ts[DeviceLifecycleState.ANIMATION] = time.monotonic()
                 return True
                 
             except usb.core.USBError as e:
@@ -141,17 +222,19 @@ class HybridApproach:
         return False
     
     def create_cbw(self, cmd, data_len=0, direction_in=False):
-        """Create a Command Block Wrapper (CBW)."""
-        flags = 0x80 if direction_in else 0x00
-        cbw = struct.pack('<IIIBBBB',
-                   CBW_SIGNATURE,    # dCBWSignature
-                   self.tag,         # dCBWTag
-                   data_len,         # dCBWDataTransferLength
-                   flags,            # bmCBWFlags
-                   0,                # bCBWLUN
-                   len(cmd),         # bCBWCBLength
-                   0)                # reserved
-        cbw += cmd + bytes(16 - len(cmd))  # Pad to 16 bytes
+        """Create a Command Block Wrapper (CBW) in the reused CBW buffer.
+        
+        The returned bytearray is overwritten by the next call.
+        """
+        # Everything but the tag is fixed per command, so copy a cached
+        # template and patch the tag in
+        key = (cmd, data_len, direction_in)
+        template = _CBW_TEMPLATES.get(key)
+        if template is None:
+            template = _CBW_TEMPLATES[key] = _build_cbw_template(*key)
+        cbw = self._cbw_buf
+        cbw[:] = template
+        _TAG.pack_into(cbw, 4, self.tag)
         return cbw
     
     def parse_csw(self, data):
@@ -159,7 +242,7 @@ class HybridApproach:
         if len(data) != 13:
             raise ValueError(f"Invalid CSW length: {len(data)}")
         
-        signature, tag, data_residue, status = struct.unpack('<IIIB', data)
+        signature, tag, data_residue, status = _CSW.unpack_from(data)
         
         if signature != CSW_SIGNATURE:
             raise ValueError(f"Invalid CSW signature: 0x{signature:08X}")
@@ -173,6 +256,8 @@ class HybridApproach:
     
     def send_command(self, cmd, data=None, read_len=0, retry_count=3, ignore_errors=False, timeout=5000):
         """Send a command to the device and handle the response with improved error handling."""
+        if self._pending_csws:
+            self.drain_csws()
         if self.device is None:
             self.log("Error: Device not connected", logging.ERROR)
             return None, None
@@ -193,30 +278,36 @@ class HybridApproach:
         while attempts < retry_count:
             try:
                 # Send command
-                cmd_hex = ' '.join(f'{b:02X}' for b in cmd)
-                self.log(f"Sending command: {cmd_hex} (tag={current_tag})", logging.DEBUG)
-                self.device.write(EP_OUT, cbw, timeout=timeout)
+                if self.verbose:
+                    logger.debug("Sending command: %s (tag=%d)", cmd.hex(), current_tag)
                 
                 # Send or receive data if needed
                 if data:
-                    self.log(f"Sending {len(data)} bytes of data", logging.DEBUG)
-                    self.device.write(EP_OUT, data, timeout=timeout)
+                    if self.verbose:
+                        logger.debug("Sending %d bytes of data", len(data))
+                    self.write_out(cbw, data, timeout)
+                    response_data = None
                 elif read_len:
-                    self.log(f"Reading {read_len} bytes of data", logging.DEBUG)
-                    response_data = self.device.read(EP_IN, read_len, timeout=timeout)
+                    self._ep_out.write(cbw, timeout)
+                    if self.verbose:
+                        logger.debug("Reading %d bytes of data", read_len)
+                    response_data = self._ep_in.read(read_len, timeout)
                 else:
+                    self._ep_out.write(cbw, timeout)
                     response_data = None
                 
-                # Read CSW
-                csw_data = self.device.read(EP_IN, 13, timeout=timeout)
-                csw = self.parse_csw(csw_data)
+                # Read CSW into the reused buffer; a short read is passed on
+                # truncated so parse_csw reports its length
+                n = self._ep_in.read(self._csw_buf, timeout)
+                csw = self.parse_csw(self._csw_buf if n == 13 else self._csw_buf[:n])
                 
                 # Update command counter
                 self.command_count += 1
                 
                 # Check status
                 if csw['status'] != 0 and not ignore_errors:
-                    self.log(f"Command failed with status: {csw['status']}", logging.DEBUG)
+                    if self.verbose:
+                        logger.debug("Command failed with status: %d", csw['status'])
                     if attempts < retry_count - 1:
                         attempts += 1
                         time.sleep(0.1 * (attempts + 1))  # Exponential backoff
@@ -230,19 +321,22 @@ class HybridApproach:
                 return response_data, csw
                 
             except usb.core.USBError as e:
-                self.log(f"USB Error: {e}", logging.DEBUG)
+                if self.verbose:
+                    logger.debug("USB Error: %s", e)
                 
                 # Handle pipe errors
-                if "Pipe error" in str(e):
-                    self.log("Clearing endpoint halts", logging.DEBUG)
+                if is_pipe_error(e):
+                    if self.verbose:
+                        logger.debug("Clearing endpoint halts")
                     try:
                         self.device.clear_halt(EP_OUT)
                         self.device.clear_halt(EP_IN)
                     except:
-                        self.log("Failed to clear halts", logging.DEBUG)
+                        if self.verbose:
+                            logger.debug("Failed to clear halts")
                 
                 # Check if device is still connected
-                if "No such device" in str(e):
+                if is_disconnect_error(e):
                     self.log("Device disconnected", logging.WARNING)
                     self.device = None
                     return None, None
@@ -270,10 +364,31 @@ class HybridApproach:
             return None, None
         raise RuntimeError(f"Command failed after {retry_count} retries")
     
+    def write_out(self, cbw, data, timeout):
+        """
+        Send a CBW and its data-out phase in the same bulk transfer.
+        
+        Both are copied into one array, which pyusb hands to libusb without a
+        further copy; payloads longer than out_chunk_size go out in chunks.
+        """
+        total = 31 + len(data)
+        if len(self._out_buf) != total:
+            self._out_buf = array('B', bytes(total))
+        out = self._out_buf
+        with memoryview(out) as view:
+            view[:31] = cbw
+            view[31:] = data
+        
+        chunk = self.out_chunk_size
+        if total <= chunk:
+            self._ep_out.write(out, timeout)
+            return
+        for offset in range(0, total, chunk):
+            self._ep_out.write(out[offset:offset + chunk], timeout)
+    
     def test_unit_ready(self, ignore_errors=True, expect_failure=False):
         """Send a TEST UNIT READY command and interpret the results."""
-        cmd = bytes([0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-        _, csw = self.send_command(cmd, retry_count=1, ignore_errors=ignore_errors)
+        _, csw = self.send_command(_CMD_TUR, retry_count=1, ignore_errors=ignore_errors)
         
         if csw is None:
             return False, False
@@ -288,9 +403,165 @@ class HybridApproach:
         
         return success, tag_match
     
+    def batch_tur(self, count, expect_failure=False):
+        """
+        Send count TEST UNIT READY commands in one bulk write, then read their CSWs.
+        
+        Returns (success, tag_match) for the batch as a whole, with the same
+        meaning as test_unit_ready. If the first batch fails in any way (a
+        device that cannot pipeline may accept the write and never send the
+        second CSW), or any batch is stalled, later calls fall back to sending
+        the commands one at a time. A stall also clears the endpoints.
+        """
+        if not self._batch_tur:
+            all_success = all_match = True
+            for _ in range(count):
+                success, tag_match = self.test_unit_ready(expect_failure=expect_failure)
+                all_success = all_success and success
+                all_match = all_match and tag_match
+            return all_success, all_match
+        
+        if self._pending_csws:
+            self.drain_csws()
+        if self.device is None:
+            self.log("Error: Device not connected", logging.ERROR)
+            return False, False
+        
+        size = 31 * count
+        if len(self._batch_buf) != size:
+            self._batch_buf = array('B', bytes(size))
+        out = self._batch_buf
+        first_tag = self.tag
+        with memoryview(out) as view:
+            for offset in range(0, size, 31):
+                view[offset:offset + 31] = self.create_cbw(_CMD_TUR)
+                self.tag = (self.tag + 1) & 0xFFFFFFFF
+        
+        all_success = all_match = True
+        written = False
+        read = 0  # CSWs taken off the IN endpoint so far
+        try:
+            self._ep_out.write(out, 5000)
+            written = True
+            # Each CSW is a short packet that ends its own transfer, so they
+            # are read one at a time
+            for i in range(count):
+                n = self._ep_in.read(self._csw_buf, 5000)
+                read += 1
+                csw = self.parse_csw(self._csw_buf if n == 13 else self._csw_buf[:n])
+                self.command_count += 1
+                all_success = all_success and (expect_failure or csw['status'] == 0)
+                all_match = all_match and csw['tag'] == (first_tag + i) & 0xFFFFFFFF
+        except usb.core.USBError as e:
+            if is_disconnect_error(e):
+                self.log("Device disconnected", logging.WARNING)
+                self.device = None
+                return False, False
+            if written:
+                # The rest of the batch's CSWs are still queued on the device;
+                # leave them for drain_csws so the next command reads its own
+                self._pending_csws += count - read
+            if is_pipe_error(e):
+                self.log("Device stalled a batched transfer, sending commands one at a time", logging.WARNING)
+                self._batch_tur = False
+                try:
+                    self.device.clear_halt(EP_OUT)
+                    self.device.clear_halt(EP_IN)
+                except usb.core.USBError:
+                    if self.verbose:
+                        logger.debug("Failed to clear halts")
+            else:
+                if self.verbose:
+                    logger.debug("USB Error: %s", e)
+                self._first_batch_failed()
+            return False, False
+        except ValueError as e:
+            if self.verbose:
+                logger.debug("Bad CSW in batch: %s", e)
+            self._pending_csws += count - read
+            self._first_batch_failed()
+            return False, False
+        
+        self._batch_tur_ok = True
+        return all_success, all_match
+    
+    def _first_batch_failed(self):
+        """Stop batching if no batch has gone through yet."""
+        if not self._batch_tur_ok:
+            self.log("First batched TEST UNIT READY failed, sending commands one at a time", logging.WARNING)
+            self._batch_tur = False
+    
+    def tur_no_wait(self):
+        """
+        Send a TEST UNIT READY heartbeat without waiting for its CSW.
+        
+        The CSW is left pending and read by drain_csws before the next
+        command goes out, by which time it has usually arrived. Returns False
+        if the command could not be sent. Once the device stalls, heartbeats
+        go out as plain test_unit_ready calls.
+        """
+        if not self._tur_no_wait:
+            return self.test_unit_ready()[0]
+        if self._pending_csws:
+            self.drain_csws()
+        if self.device is None:
+            return False
+        
+        cbw = self.create_cbw(_CMD_TUR)
+        self.tag = (self.tag + 1) & 0xFFFFFFFF
+        try:
+            self._ep_out.write(cbw, 5000)
+        except usb.core.USBError as e:
+            self._handle_heartbeat_error(e)
+            return False
+        self._pending_csws += 1
+        return True
+    
+    def drain_csws(self):
+        """Read the CSWs left pending by tur_no_wait. Returns False if any failed."""
+        ok = True
+        while self._pending_csws:
+            self._pending_csws -= 1
+            if self.device is None:
+                continue
+            try:
+                n = self._ep_in.read(self._csw_buf, 5000)
+                csw = self.parse_csw(self._csw_buf if n == 13 else self._csw_buf[:n])
+                self.command_count += 1
+                ok = ok and csw['status'] == 0
+            except usb.core.USBError as e:
+                self._handle_heartbeat_error(e)
+                ok = False
+            except ValueError as e:
+                if self.verbose:
+                    logger.debug("Bad heartbeat CSW: %s", e)
+                ok = False
+        return ok
+    
+    def _handle_heartbeat_error(self, e):
+        """Deal with a transfer error on a deferred-CSW heartbeat."""
+        if is_disconnect_error(e):
+            self.log("Device disconnected", logging.WARNING)
+            self.device = None
+            self._pending_csws = 0
+        elif is_pipe_error(e):
+            self.log("Device stalled a deferred CSW, waiting for each CSW from now on", logging.WARNING)
+            self._tur_no_wait = False
+            self._pending_csws = 0
+            try:
+                self.device.clear_halt(EP_OUT)
+                self.device.clear_halt(EP_IN)
+            except usb.core.USBError:
+                if self.verbose:
+                    logger.debug("Failed to clear halts")
+        elif self.verbose:
+            logger.debug("USB Error: %s", e)
+    
     def inquiry(self, allocation_length=36):
         """Send an INQUIRY command."""
-        cmd = bytes([0x12, 0x00, 0x00, 0x00, allocation_length, 0x00])
+        cmd = _INQUIRY_CMDS.get(allocation_length)
+        if cmd is None:
+            cmd = _INQUIRY_CMDS[allocation_length] = bytes([0x12, 0x00, 0x00, 0x00, allocation_length, 0x00])
         data, csw = self.send_command(cmd, read_len=allocation_length, retry_count=2, ignore_errors=True)
         
         if data is None or csw is None:
@@ -301,47 +572,74 @@ class HybridApproach:
     def detect_state_transition(self):
         """Detect state transitions based on command responses."""
         # Check for transitions
-        now = time.time()
+        now = time.monotonic()
         
         if self.state == DeviceLifecycleState.ANIMATION:
             # After about 55 seconds, transition to CONNECTING state
-            if now - self.state_transition_times[DeviceLifecycleState.ANIMATION] >= 55:
+            if now - self._ts[DeviceLifecycleState.ANIMATION] >= 55:
                 self.state = DeviceLifecycleState.CONNECTING
-                self.state_transition_times[DeviceLifecycleState.CONNECTING] = now
-                self.log(f"State transition: {DeviceLifecycleState.ANIMATION} → {DeviceLifecycleState.CONNECTING}")
+                self._ts[DeviceLifecycleState.CONNECTING] = now
+                self.log(f"State transition: {STATE_NAMES[DeviceLifecycleState.ANIMATION]} → {STATE_NAMES[DeviceLifecycleState.CONNECTING]}")
                 return True
         
         elif self.state == DeviceLifecycleState.CONNECTING:
             # After about 3 seconds in CONNECTING, transition to CONNECTED state
-            if now - self.state_transition_times[DeviceLifecycleState.CONNECTING] >= 3:
+            if now - self._ts[DeviceLifecycleState.CONNECTING] >= 3:
                 self.state = DeviceLifecycleState.CONNECTED
-                self.state_transition_times[DeviceLifecycleState.CONNECTED] = now
-                self.log(f"State transition: {DeviceLifecycleState.CONNECTING} → {DeviceLifecycleState.CONNECTED}")
+                self._ts[DeviceLifecycleState.CONNECTED] = now
+                self.log(f"State transition: {STATE_NAMES[DeviceLifecycleState.CONNECTING]} → {STATE_NAMES[DeviceLifecycleState.CONNECTED]}")
                 return True
         
         return False
     
+    @staticmethod
+    def _wait_tick(tick, interval, deadline):
+        """
+        Sleep until the next tick of a fixed-rate schedule and return it.
+        
+        Time spent on the command itself comes out of the interval, the sleep
+        never runs past the deadline, and a late tick restarts the schedule
+        from now instead of firing a burst of commands to catch up.
+        """
+        now = time.monotonic()
+        tick = max(tick + interval, now)
+        wake = min(tick, deadline)
+        if wake > now:
+            time.sleep(wake - now)
+        return tick
+    
     def wait_for_animation_phase(self):
         """Wait during the animation phase, sending TEST UNIT READY commands."""
         self.log("Phase 1: Animation state (waiting for ~55 seconds)")
-        start_time = time.time()
-        animation_end_time = start_time + 55
-        
-        while time.time() < animation_end_time and self.device is not None:
+        start_time = time.monotonic()
+        deadline = start_time + 55
+        tick = start_time
+        
+        # Bound once; the loop runs for close to a minute
+        monotonic = time.monotonic
+        batch_tur = self.batch_tur
+        detect = self.detect_state_transition
+        wait_tick = self._wait_tick
+        
+        while self.device is not None:
+            now = monotonic()
+            if now >= deadline:
+                break
             try:
-                # Send TEST UNIT READY every 200ms
-                success, tag_match = self.test_unit_ready(expect_failure=True)
+                # Send TEST UNIT READY every 200ms, TUR_BATCH_SIZE at a time
+                success, tag_match = batch_tur(TUR_BATCH_SIZE, expect_failure=True)
                 
-                if self.command_count % 10 == 0:
-                    elapsed = time.time() - start_time
-                    self.log(f"Animation state: {self.command_count} commands sent, elapsed: {elapsed:.1f}s")
+                self._log_ticks -= 1
+                if not self._log_ticks:
+                    self._log_ticks = 5
+                    self.log(f"Animation state: {self.command_count} commands sent, elapsed: {now - start_time:.1f}s")
                 
                 # Check for state transition
-                if self.detect_state_transition():
+                if detect():
                     break
                 
-                # Sleep 200ms between commands
-                time.sleep(0.2)
+                # Send batches at a fixed rate
+                tick = wait_tick(tick, 0.2 * TUR_BATCH_SIZE, deadline)
                 
             except Exception as e:
                 self.log(f"Error in Animation state: {e}", logging.WARNING)
@@ -359,24 +657,30 @@ class HybridApproach:
     def wait_for_connecting_phase(self):
         """Wait during the connecting phase."""
         if self.state != DeviceLifecycleState.CONNECTING:
-            self.log(f"Expected CONNECTING state, but current state is {self.state}", logging.WARNING)
+            self.log(f"Expected CONNECTING state, but current state is {STATE_NAMES[self.state]}", logging.WARNING)
             return False
         
         self.log("Phase 2: Connecting state (waiting for ~3 seconds)")
-        start_time = time.time()
+        start_time = time.monotonic()
         connecting_end_time = start_time + 3
+        tick = start_time
         
-        while time.time() < connecting_end_time and self.device is not None:
+        monotonic = time.monotonic
+        test_unit_ready = self.test_unit_ready
+        detect = self.detect_state_transition
+        wait_tick = self._wait_tick
+        
+        while monotonic() < connecting_end_time and self.device is not None:
             try:
                 # Send TEST UNIT READY every 100ms
-                success, tag_match = self.test_unit_ready()
+                success, tag_match = test_unit_ready()
                 
                 # Check for state transition
-                if self.detect_state_transition():
+                if detect():
                     break
                 
-                # Sleep 100ms between commands
-                time.sleep(0.1)
+                # Send commands at a fixed 100ms rate
+                tick = wait_tick(tick, 0.1, connecting_end_time)
                 
             except Exception as e:
                 self.log(f"Error in Connecting state: {e}", logging.WARNING)
@@ -394,22 +698,28 @@ class HybridApproach:
     def stabilize_connection(self, duration=10):
         """Stabilize the connection by sending simple commands."""
         if self.state != DeviceLifecycleState.CONNECTED:
-            self.log(f"Expected CONNECTED state, but current state is {self.state}", logging.WARNING)
+            self.log(f"Expected CONNECTED state, but current state is {STATE_NAMES[self.state]}", logging.WARNING)
             return False
         
         self.log(f"Phase 3: Connected state - Stabilizing connection for {duration} seconds")
-        start_time = time.time()
+        start_time = time.monotonic()
         end_time = start_time + duration
+        tick = start_time
         
         self.log("Sending TEST UNIT READY commands to maintain connection...")
         
-        while time.time() < end_time and self.device is not None:
+        monotonic = time.monotonic
+        tur_no_wait = self.tur_no_wait
+        wait_tick = self._wait_tick
+        
+        while monotonic() < end_time and self.device is not None:
             try:
-                # Send TEST UNIT READY every 500ms
-                success, tag_match = self.test_unit_ready()
+                # Send TEST UNIT READY every 500ms; its CSW is only read
+                # before the next command, so the loop never waits on it
+                tur_no_wait()
                 
-                # Sleep 500ms between commands
-                time.sleep(0.5)
+                # Send commands at a fixed 500ms rate
+                tick = wait_tick(tick, 0.5, end_time)
                 
             except Exception as e:
                 self.log(f"Error while stabilizing connection: {e}", logging.WARNING)
@@ -421,13 +731,14 @@ class HybridApproach:
                         self.log("Failed to reconnect, exiting stabilization phase", logging.ERROR)
                         return False
         
+        self.drain_csws()
         self.log(f"Connection stabilized for {duration} seconds")
         return self.device is not None
     
     def initialize_display(self):
         """Initialize the display with a careful approach."""
         if self.state != DeviceLifecycleState.CONNECTED:
-            self.log(f"Expected CONNECTED state, but current state is {self.state}", logging.WARNING)
+            self.log(f"Expected CONNECTED state, but current state is {STATE_NAMES[self.state]}", logging.WARNING)
             return False
         
         self.log("Phase 4: Connected state - Initializing display")
@@ -453,74 +764,21 @@ class HybridApproach:
                 # Continue anyway
             
             # Send initialization commands with careful timing and error handling
-            self.log("Sending F5 01 (Initialize Display)")
-            cmd = bytes([0xF5, 0x01, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-            _, csw = self.send_command(cmd, retry_count=1, ignore_errors=True, timeout=2000)
-            
-            # Check if device is still connected
-            if self.device is None:
-                self.log("Device disconnected after F5 01 command", logging.ERROR)
-                return False
-            
-            # Sleep longer between commands
-            time.sleep(1)
-            
-            # Send TEST UNIT READY to check device still responds
-            success, tag_match = self.test_unit_ready()
-            self.log(f"TEST UNIT READY after F5 01: Success={success}, Tag Match={tag_match}")
-            
-            # Send F5 20 (Set Mode)
-            self.log("Sending F5 20 (Set Mode)")
-            cmd = bytes([0xF5, 0x20, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-            data = bytes([0x05, 0x00, 0x00, 0x00])
-            _, csw = self.send_command(cmd, data=data, retry_count=1, ignore_errors=True, timeout=2000)
-            
-            # Check if device is still connected
-            if self.device is None:
-                self.log("Device disconnected after F5 20 command", logging.ERROR)
-                return False
-            
-            # Sleep longer between commands
-            time.sleep(1)
-            
-            # Send TEST UNIT READY to check device still responds
-            success, tag_match = self.test_unit_ready()
-            self.log(f"TEST UNIT READY after F5 20: Success={success}, Tag Match={tag_match}")
-            
-            # Send F5 10 (Stop Animation)
-            self.log("Sending F5 10 (Stop Animation)")
-            cmd = bytes([0xF5, 0x10, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-            data = bytes([0x00])
-            _, csw = self.send_command(cmd, data=data, retry_count=1, ignore_errors=True, timeout=2000)
-            
-            # Check if device is still connected
-            if self.device is None:
-                self.log("Device disconnected after F5 10 command", logging.ERROR)
-                return False
-            
-            # Sleep longer between commands
-            time.sleep(1)
-            
-            # Send TEST UNIT READY to check device still responds
-            success, tag_match = self.test_unit_ready()
-            self.log(f"TEST UNIT READY after F5 10: Success={success}, Tag Match={tag_match}")
-            
-            # Send F5 A0 (Clear Screen)
-            self.log("Sending F5 A0 (Clear Screen)")
-            cmd = bytes([0xF5, 0xA0, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-            _, csw = self.send_command(cmd, retry_count=1, ignore_errors=True, timeout=2000)
-            
-            # Check if device is still connected
-            if self.device is None:
-                self.log("Device disconnected after F5 A0 command", logging.ERROR)
-                return False
-            
-            # Sleep longer
-            time.sleep(2)
-            
-            # Send TEST UNIT READY to check device still responds
-            success, tag_match = self.test_unit_ready()
-            self.log(f"TEST UNIT READY after F5 A0: Success={success}, Tag Match={tag_match}")
+            for label, description, cmd, data, delay in _INIT_SEQ:
+                self.log(f"Sending {label} ({description})")
+                _, csw = self.send_command(cmd, data=data, retry_count=1, ignore_errors=True, timeout=2000)
+                
+                # Check if device is still connected
+                if self.device is None:
+                    self.log(f"Device disconnected after {label} command", logging.ERROR)
+                    return False
+                
+                # Sleep longer between commands
+                time.sleep(delay)
+                
+                # Send TEST UNIT READY to check device still responds
+                success, tag_match = self.test_unit_ready()
+                self.log(f"TEST UNIT READY after {label}: Success={success}, Tag Match={tag_match}")
             
             self.log("Display initialization completed")
             return True
@@ -529,6 +787,31 @@ class HybridApproach:
             self.log(f"Error initializing display: {e}", logging.ERROR)
             return False
     
+    def _frame_reader(self, frames, free_bufs, ready, stop):
+        """
+        Read frames into buffers taken from free_bufs and queue them on ready.
+        
+        Puts (index, name, buffer, length) tuples followed by None. The
+        consumer hands each buffer back through free_bufs once its frame has
+        been sent.
+        """
+        try:
+            for i, (_, frame_path, _) in enumerate(frames):
+                buf = free_bufs.get()
+                if stop.is_set():
+                    return
+                try:
+                    # Read frame data straight into the preallocated buffer
+                    with open(frame_path, 'rb') as f:
+                        n = f.readinto(buf)
+                except OSError as e:
+                    self.log(f"Error reading frame {i+1}: {e}", logging.ERROR)
+                    free_bufs.put(buf)
+                    continue
+                ready.put((i, frames[i][0], buf, n))
+        finally:
+            ready.put(None)
+    
     def send_frames(self, max_frames=None):
         """Send frames to the display."""
         if not self.frames:
@@ -536,7 +819,7 @@ class HybridApproach:
             return False
         
         if self.state != DeviceLifecycleState.CONNECTED:
-            self.log(f"Expected CONNECTED state, but current state is {self.state}", logging.WARNING)
+            self.log(f"Expected CONNECTED state, but current state is {STATE_NAMES[self.state]}", logging.WARNING)
             return False
         
         self.log(f"Phase 5: Sending frames")
@@ -547,39 +830,58 @@ class HybridApproach:
         
         self.log(f"Will send {len(frames_to_send)} frames")
         
-        for i, frame_path in enumerate(frames_to_send):
-            try:
-                # Read frame data
-                with open(frame_path, 'rb') as f:
-                    frame_data = f.read()
-                
-                # Send Display Image command
-                frame_name = os.path.basename(frame_path)
-                self.log(f"Sending frame {i+1}/{len(frames_to_send)}: {frame_name} ({len(frame_data)} bytes)")
-                
-                cmd = bytes([0xF5, 0xB0, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
-                _, csw = self.send_command(cmd, data=frame_data, retry_count=1, ignore_errors=True, timeout=5000)
-                
-                # Check if device is still connected
-                if self.device is None:
-                    self.log(f"Device disconnected while sending frame {i+1}", logging.ERROR)
-                    return False
-                
-                # Wait between frames
-                if i < 3:
-                    time.sleep(0.5)  # Shorter delay for first few frames
-                else:
-                    time.sleep(1.0)  # Longer delay for later frames
-                
-                # Send a TEST UNIT READY every 2 frames to maintain connection
-                if i % 2 == 0:
-                    success, tag_match = self.test_unit_ready()
-                    self.log(f"TEST UNIT READY between frames: Success={success}, Tag Match={tag_match}")
-                
-            except Exception as e:
-                self.log(f"Error sending frame {i+1}: {e}", logging.ERROR)
-                # Continue with next frame
-                continue
+        # Frames are read on a producer thread into one of two buffers while
+        # the other is on the bus; PyUSB drops the GIL during transfers, so
+        # disk reads and USB submission overlap. Both buffers are sized for the
+        # largest frame up front, so no frame allocates.
+        max_size = max(size for _, _, size in frames_to_send)
+        free_bufs = queue.Queue()
+        for _ in range(2):
+            free_bufs.put(array('B', bytes(max_size)))
+        ready = queue.Queue()
+        stop = threading.Event()
+        reader = threading.Thread(target=self._frame_reader,
+                                  args=(frames_to_send, free_bufs, ready, stop),
+                                  daemon=True)
+        reader.start()
+        
+        frame_count = len(frames_to_send)
+        tur_ticks = 1  # Frames until the next TEST UNIT READY
+        try:
+            while True:
+                item = ready.get()
+                if item is None:
+                    break
+                i, frame_name, buf, n = item
+                frame_data = memoryview(buf)[:n]
+                try:
+                    # Send Display Image command
+                    logger.info("Sending frame %d/%d: %s (%d bytes)", i + 1, frame_count, frame_name, n)
+                    
+                    _, csw = self.send_command(_CMD_F5_B0, data=frame_data, retry_count=1, ignore_errors=True, timeout=5000)
+                    
+                    # Check if device is still connected
+                    if self.device is None:
+                        self.log(f"Device disconnected while sending frame {i+1}", logging.ERROR)
+                        return False
+                    
+                    # Send a TEST UNIT READY every 2 frames to maintain connection
+                    tur_ticks -= 1
+                    if not tur_ticks:
+                        tur_ticks = 2
+                        success, tag_match = self.test_unit_ready()
+                        logger.info("TEST UNIT READY between frames: Success=%s, Tag Match=%s", success, tag_match)
+                    
+                except Exception as e:
+                    self.log(f"Error sending frame {i+1}: {e}", logging.ERROR)
+                    # Continue with next frame
+                    continue
+                finally:
+                    frame_data.release()
+                    free_bufs.put(buf)
+        finally:
+            stop.set()
+            free_bufs.put(array('B'))  # Wake the reader if it is waiting for a buffer
         
         self.log("Frame sending completed")
         return True
@@ -655,12 +957,14 @@ def main():
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
     parser.add_argument('--interactive', action='store_true', help='Enable interactive pauses')
     parser.add_argument('--max-frames', type=int, help='Maximum number of frames to send')
+    parser.add_argument('--out-chunk-size', type=int, default=OUT_CHUNK_SIZE,
+                        help=f'Largest bulk OUT transfer in bytes (default: {OUT_CHUNK_SIZE})')
     args = parser.parse_args()
     
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
-    hybrid = HybridApproach(args.frames_dir, args.verbose)
+    hybrid = HybridApproach(args.frames_dir, args.verbose, args.out_chunk_size)
     hybrid.run_hybrid_approach(interactive=args.interactive)
 
 if __name__ == '__main__':
@@ -10,8 +10,12 @@ replays the binary frames from the Hex Dumps folder.
 import os
 import sys
 import time
+import queue
 import argparse
 import logging
+import threading
+from array import array
+import numpy as np
 import usb.core
 import usb.util
 from struct import pack, unpack
@@ -22,7 +26,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
 # Import the ALi LCD device class
 from ali_lcd_device.device import ALiLCDDevice
 from ali_lcd_device.lifecycle import DeviceLifecycleState
-from ali_lcd_device.commands import create_f5_display_image_command
+from ali_lcd_device.commands import create_f5_display_image_command, create_test_unit_ready
 
 # Configure logging
 logging.basicConfig(
@@ -34,9 +38,11 @@ logger = logging.getLogger(__name__)
 
 # Constants for frame replay
 F5_DISPLAY_IMAGE = 0xB0
+MAX_XFER = 2 * 1024 * 1024  # Largest single bulk write the firmware accepts
 
 class FrameReplayer:
-    def __init__(self, frames_dir, device=None, verbose=False):
+    def __init__(self, frames_dir, device=None, verbose=False, max_xfer=MAX_XFER,
+                 pixel_swap=False):
         """
         Initialize the frame replayer.
         
@@ -44,15 +50,29 @@ class FrameReplayer:
             frames_dir (str): Directory containing binary frame files
             device (ALiLCDDevice): Pre-initialized ALi LCD device
             verbose (bool): Enable verbose logging
+            max_xfer (int): Largest single bulk write when sending a frame
+            pixel_swap (bool): Swap the byte order of each RGB565 pixel at load
+                time, for frames dumped with the other endianness
         """
         self.frames_dir = frames_dir
         self.frames = []
+        self.arena = None  # All frames back to back, filled by load_frames
         self.device = device
         self.verbose = verbose
+        self.max_xfer = max_xfer
+        self.pixel_swap = pixel_swap
         
         # Load frames from directory
         self.load_frames()
     
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+    
     def log(self, message):
         """Log a message if verbose mode is enabled."""
         if self.verbose:
@@ -66,20 +86,58 @@ class FrameReplayer:
             raise ValueError(f"Frames directory not found: {self.frames_dir}")
         
         self.log(f"Loading frames from {self.frames_dir}")
-        files = [f for f in os.listdir(self.frames_dir) if f.endswith('.bin')]
-        files.sort()  # Sort to ensure consistent order
+        with os.scandir(self.frames_dir) as it:
+            entries = [e for e in it if e.name.endswith('.bin')]
+        entries.sort(key=lambda e: e.name)  # Sort to ensure consistent order
+        
+        files = [e.name for e in entries]
+        paths = [e.path for e in entries]
+        sizes = [e.stat().st_size for e in entries]
         
-        for file in files:
-            filepath = os.path.join(self.frames_dir, file)
-            size = os.path.getsize(filepath)
+        # All frames are read once into one contiguous buffer, and each frame
+        # is a view of its slice, so replay does no file I/O at all
+        self.arena = array('B', bytes(sum(sizes)))
+        arena_view = memoryview(self.arena)
+        offset = 0
+        for file, path, size in zip(files, paths, sizes):
             self.log(f"Found frame: {file} ({size} bytes)")
-            self.frames.append(filepath)
+            frame_data = arena_view[offset:offset + size]
+            with open(path, 'rb') as f:
+                f.readinto(frame_data)
+            if self.pixel_swap:
+                # Swapped once in place rather than on every send
+                np.frombuffer(frame_data, dtype=np.uint16, count=size // 2).byteswap(True)
+            self.frames.append((file, frame_data, size))
+            offset += size
+        arena_view.release()
         
         if len(self.frames) == 0:
             raise ValueError("No frame files found")
         
         self.log(f"Loaded {len(self.frames)} frames")
     
+    def _frame_stager(self, cycles, free_bufs, ready, stop):
+        """
+        Copy frames into buffers taken from free_bufs and queue them on ready.
+        
+        Puts (cycle, index, name, buffer) tuples followed by None. The
+        consumer hands each buffer back through free_bufs once its frame has
+        been sent.
+        """
+        try:
+            for cycle in range(cycles):
+                for i, (name, frame_data, size) in enumerate(self.frames):
+                    buf = free_bufs.get()
+                    if stop.is_set():
+                        return
+                    if len(buf) != size:
+                        buf = array('B', bytes(size))
+                    with memoryview(buf) as view:
+                        view[:] = frame_data
+                    ready.put((cycle, i, name, buf))
+        finally:
+            ready.put(None)
+    
     def replay_frames(self, cycles=1, delay=0.1):
         """
         Replay the frames in sequence.
@@ -94,45 +152,97 @@ class FrameReplayer:
         
         logger.info(f"Replaying {len(self.frames)} frames for {cycles} cycles with {delay}s delay")
         
-        for cycle in range(cycles):
-            logger.info(f"Starting cycle {cycle+1}/{cycles}")
-            
-            for i, frame_path in enumerate(self.frames):
-                # Read frame data
-                with open(frame_path, 'rb') as f:
-                    frame_data = f.read()
+        # The display image command is the same for every frame
+        cmd, data_length, direction = create_f5_display_image_command(
+            width=480, height=480, x=0, y=0)
+        keep_alive_cmd = create_test_unit_ready() + (None,)
+        
+        # Frames go out on a fixed schedule, one every `delay` seconds: the
+        # time spent on the transfer comes out of the delay rather than
+        # being added to it
+        next_frame = time.monotonic()
+        
+        frame_count = len(self.frames)
+        
+        # Frames are copied out of the arena into one of two send buffers on a
+        # producer thread while the other is on the bus; PyUSB drops the GIL
+        # during transfers, so staging the next frame overlaps sending this one
+        free_bufs = queue.Queue()
+        for _ in range(2):
+            free_bufs.put(array('B', bytes(self.frames[0][2])))
+        ready = queue.Queue()
+        stop = threading.Event()
+        stager = threading.Thread(target=self._frame_stager,
+                                  args=(cycles, free_bufs, ready, stop),
+                                  daemon=True)
+        stager.start()
+        
+        try:
+            while True:
+                item = ready.get()
+                if item is None:
+                    break
+                cycle, i, name, frame_data = item
+                size = len(frame_data)
+                if i == 0:
+                    logger.info("Starting cycle %d/%d", cycle + 1, cycles)
                 
-                logger.info(f"Sending frame {i+1}/{len(self.frames)}: {os.path.basename(frame_path)} ({len(frame_data)} bytes)")
+                logger.info("Sending frame %d/%d: %s (%d bytes)", i + 1, frame_count, name, size)
+                
+                # Send TEST UNIT READY occasionally to maintain connection
+                keep_alive = i % 3 == 0
                 
                 # Use our device instance to send the frame
                 try:
-                    # Create F5 display image command
-                    cmd, data_length, direction = create_f5_display_image_command(
-                        width=480, height=480, x=0, y=0)
-                    
-                    # Send the command and data
-                    success, tag_mismatch, _ = self.device._send_command(
-                        cmd, len(frame_data), direction, frame_data)
+                    if keep_alive and self.device.pipelining:
+                        # The keep-alive follows the frame in the same bulk write;
+                        # after a failed batch the device sends them one at a time
+                        keep_alive = False
+                        (success, tag_mismatch, _), _ = self.device._send_command_batch(
+                            [(cmd, size, direction, frame_data), keep_alive_cmd],
+                            max_xfer=self.max_xfer)
+                    else:
+                        # Send the command and data
+                        success, tag_mismatch, _ = self.device._send_command(
+                            cmd, size, direction, frame_data, max_xfer=self.max_xfer)
                     
                     if not success:
-                        logger.warning(f"Failed to send frame {i+1} (status != 0)")
+                        logger.warning("Failed to send frame %d (status != 0)", i + 1)
                     elif tag_mismatch:
-                        logger.warning(f"Tag mismatch when sending frame {i+1}")
+                        logger.warning("Tag mismatch when sending frame %d", i + 1)
                     else:
-                        logger.info(f"Frame {i+1} sent successfully")
+                        logger.info("Frame %d sent successfully", i + 1)
                     
                 except Exception as e:
-                    logger.error(f"Error sending frame: {e}")
+                    logger.error("Error sending frame: %s", e)
                 
-                # Wait before sending next frame
-                time.sleep(delay)
-                
-                # Send TEST UNIT READY occasionally to maintain connection
-                if i % 3 == 0:
+                if keep_alive:
                     try:
                         self.device._test_unit_ready()
                     except Exception as e:
-                        logger.warning(f"Error in keep-alive command: {e}")
+                        logger.warning("Error in keep-alive command: %s", e)
+                
+                # The buffer can take the next frame while this one's slot runs out
+                free_bufs.put(frame_data)
+                
+                # Wait for the next frame's slot
+                next_frame += delay
+                remaining = next_frame - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+                else:
+                    next_frame -= remaining  # Running late; restart the schedule from now
+        finally:
+            stop.set()
+            free_bufs.put(array('B'))  # Wake the stager if it is waiting for a buffer
+            stager.join()
+    
+    def close(self):
+        """Release the frame views and the arena behind them."""
+        for _, frame_data, _ in self.frames:
+            frame_data.release()
+        self.frames = []
+        self.arena = None
 
 def initialize_device():
     """
@@ -177,25 +287,24 @@ def main():
     parser.add_argument('--cycles', type=int, default=1, help='Number of replay cycles')
     parser.add_argument('--delay', type=float, default=0.1, help='Delay between frames (seconds)')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--max-xfer', type=int, default=MAX_XFER,
+                        help='Largest single bulk write in bytes when sending a frame')
+    parser.add_argument('--pixel-swap', action='store_true',
+                        help='Swap the byte order of each RGB565 pixel when loading frames')
     args = parser.parse_args()
     
     try:
-        # First initialize the device using the proven method
-        device = initialize_device()
-        
-        # Then use the frame replayer to send the binary frames
-        replayer = FrameReplayer(args.frames_dir, device, args.verbose)
-        replayer.replay_frames(cycles=args.cycles, delay=args.delay)
+        # First initialize the device using the proven method; both it and
+        # the replayer are closed when their blocks exit
+        with initialize_device() as device:
+            # Then use the frame replayer to send the binary frames
+            with FrameReplayer(args.frames_dir, device, args.verbose, args.max_xfer,
+                               args.pixel_swap) as replayer:
+                replayer.replay_frames(cycles=args.cycles, delay=args.delay)
         
     except Exception as e:
         logger.error(f"Error: {e}")
         sys.exit(1)
-        
-    finally:
-        # Close the device connection
-        if 'device' in locals():
-            logger.info("Closing device connection")
-            device.close()
     
     logger.info("Frame replay completed successfully")
 
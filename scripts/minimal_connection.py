@@ -54,34 +54,52 @@ def stabilize_connection(device, frames_dir=None):
         
         # Send regular TEST UNIT READY commands to keep the connection alive
         stable_seconds = 0
-        start_time = time.time()
+        start_time = time.monotonic()
+        next_command = start_time
         keep_alive_count = 0
         inquiry_count = 0
         
+        # Every fifth TEST UNIT READY goes out together with an INQUIRY in one
+        # bulk write; after a failed pair they are sent separately again
+        tur_inquiry = [create_test_unit_ready() + (None,), create_inquiry() + (None,)]
+        
         try:
             while stable_seconds < 30:  # Maintain stable connection for 30 seconds
                 # Send TEST UNIT READY every second
                 try:
-                    success, _ = device._test_unit_ready()
-                    keep_alive_count += 1
-                    
                     # Every 5 commands, send an INQUIRY
-                    if keep_alive_count % 5 == 0:
+                    send_inquiry = (keep_alive_count + 1) % 5 == 0
+                    
+                    if send_inquiry and device.pipelining:
                         logger.info(f"Sending INQUIRY command ({inquiry_count})")
-                        inquiry_success, _, inquiry_data = device._inquiry()
-                        if inquiry_success and inquiry_data:
-                            inquiry_count += 1
-                            logger.info(f"INQUIRY successful: {inquiry_data[:16].hex()}")
+                        (success, _, _), (inquiry_success, _, inquiry_data) = \
+                            device._send_command_batch(tur_inquiry)
+                    else:
+                        success, _ = device._test_unit_ready()
+                        if send_inquiry:
+                            logger.info(f"Sending INQUIRY command ({inquiry_count})")
+                            inquiry_success, _, inquiry_data = device._inquiry()
+                    keep_alive_count += 1
+                    
+                    if send_inquiry and inquiry_success and inquiry_data:
+                        inquiry_count += 1
+                        logger.info(f"INQUIRY successful: {bytes(inquiry_data[:16]).hex()}")
                     
                     # Log status periodically
                     if keep_alive_count % 10 == 0:
                         logger.info(f"Maintaining connection: {keep_alive_count} commands sent, state: {device.lifecycle_state}")
                     
                     # Update stable connection time
-                    stable_seconds = time.time() - start_time
+                    stable_seconds = time.monotonic() - start_time
                     
-                    # Small delay between commands
-                    time.sleep(0.5)
+                    # Keep to a fixed 0.5s cadence; the command's own round
+                    # trip comes out of the wait instead of adding to it
+                    next_command += 0.5
+                    remaining = next_command - time.monotonic()
+                    if remaining > 0:
+                        time.sleep(remaining)
+                    else:
+                        next_command -= remaining  # Running late; restart the cadence from now
                     
                 except Exception as e:
                     logger.warning(f"Error during keep-alive: {e}")
@@ -152,62 +170,56 @@ def main():
     logger.info("Starting minimal communication test")
     
     try:
-        # Create device instance
-        device = ALiLCDDevice()
-        
-        # Establish and maintain a stable connection
-        if stabilize_connection(device, args.frames_dir):
-            # If we've maintained a stable connection, try some simple commands
-            try_simple_commands(device)
-            
-            # Now wait for user input before proceeding
-            input("\nPress Enter to proceed with display initialization or Ctrl+C to exit...\n")
-            
-            # Try to initialize the display
-            logger.info("Initializing display")
-            if device.initialize_display():
-                logger.info("Display initialized successfully")
+        # Create device instance; it is closed when the block exits
+        with ALiLCDDevice() as device:
+            # Establish and maintain a stable connection
+            if stabilize_connection(device, args.frames_dir):
+                # If we've maintained a stable connection, try some simple commands
+                try_simple_commands(device)
                 
-                # Wait for user input before proceeding
-                input("\nPress Enter to try sending a frame or Ctrl+C to exit...\n")
+                # Now wait for user input before proceeding
+                input("\nPress Enter to proceed with display initialization or Ctrl+C to exit...\n")
                 
-                # Try to send a simple test pattern
-                logger.info("Sending a test pattern")
-                if args.frames_dir and os.path.exists(args.frames_dir):
-                    files = [f for f in os.listdir(args.frames_dir) if f.endswith('.bin')]
-                    if files:
-                        first_frame = os.path.join(args.frames_dir, files[0])
-                        logger.info(f"Sending frame: {first_frame}")
-                        
-                        # Read the frame data
-                        with open(first_frame, 'rb') as f:
-                            frame_data = f.read()
-                        
-                        # Send display image command
-                        from ali_lcd_device.commands import create_f5_display_image_command
-                        cmd, data_length, direction = create_f5_display_image_command(width=480, height=480, x=0, y=0)
-                        success, tag_mismatch, _ = device._send_command(cmd, len(frame_data), direction, frame_data)
-                        
-                        if success:
-                            logger.info("Frame sent successfully")
+                # Try to initialize the display
+                logger.info("Initializing display")
+                if device.initialize_display():
+                    logger.info("Display initialized successfully")
+                    
+                    # Wait for user input before proceeding
+                    input("\nPress Enter to try sending a frame or Ctrl+C to exit...\n")
+                    
+                    # Try to send a simple test pattern
+                    logger.info("Sending a test pattern")
+                    if args.frames_dir and os.path.exists(args.frames_dir):
+                        files = [f for f in os.listdir(args.frames_dir) if f.endswith('.bin')]
+                        if files:
+                            first_frame = os.path.join(args.frames_dir, files[0])
+                            logger.info(f"Sending frame: {first_frame}")
+                            
+                            # Read the frame data
+                            with open(first_frame, 'rb') as f:
+                                frame_data = f.read()
+                            
+                            # Send display image command
+                            from ali_lcd_device.commands import create_f5_display_image_command
+                            cmd, data_length, direction = create_f5_display_image_command(width=480, height=480, x=0, y=0)
+                            success, tag_mismatch, _ = device._send_command(cmd, len(frame_data), direction, frame_data)
+                            
+                            if success:
+                                logger.info("Frame sent successfully")
+                            else:
+                                logger.warning(f"Failed to send frame (status != 0, tag_mismatch: {tag_mismatch})")
                         else:
-                            logger.warning(f"Failed to send frame (status != 0, tag_mismatch: {tag_mismatch})")
+                            logger.warning("No frame files found")
                     else:
-                        logger.warning("No frame files found")
+                        logger.warning("No frames directory specified")
                 else:
-                    logger.warning("No frames directory specified")
-            else:
-                logger.warning("Failed to initialize display")
-        
+                    logger.warning("Failed to initialize display")
+            
     except KeyboardInterrupt:
         logger.info("Operation interrupted by user")
     except Exception as e:
         logger.error(f"Error: {e}")
-    finally:
-        # Close the device connection
-        if 'device' in locals():
-            logger.info("Closing device connection")
-            device.close()
     
     logger.info("Test completed")
 
@@ -27,6 +27,7 @@ import usb.util
 import struct
 import logging
 import argparse
+from array import array
 from datetime import datetime
 
 # Configure logging
@@ -46,6 +47,16 @@ PRODUCT_ID = 0x3922
 EP_OUT = 0x02
 EP_IN = 0x81
 
+# CBW header: signature, tag, data transfer length, flags, LUN, command
+# length; the 16-byte command block follows at offset 15
+CBW_HEADER = struct.Struct('<4sIIBBB')
+CBW_FIELDS = struct.Struct('<IIB')  # Tag, data transfer length and flags, at offset 4
+MAX_TRANSFER = 1 << 20  # Largest single bulk OUT write
+CSW = struct.Struct('<4sIIB')  # Signature, tag, data residue, status
+# The CSW read blocks until the device posts it, so this only bounds how
+# long a command that never completes can hold up the loop
+CSW_TIMEOUT = 2000
+
 # SCSI Commands
 TEST_UNIT_READY_CMD = b'\x00\x00\x00\x00\x00\x00'
 INQUIRY_CMD = b'\x12\x00\x00\x00\x24\x00'
@@ -60,6 +71,20 @@ F5_COMMANDS = {
     'CLEAR_SCREEN': b'\xF5\xA0\x00\x00\x00\x00',
 }
 
+def build_cbw_template(command):
+    """Build the CBW for a command as an array, with tag, length and flags left zero"""
+    cbw = array('B', bytes(31))
+    CBW_HEADER.pack_into(cbw, 0,
+        b'USBC',                 # Signature
+        0,                       # Tag
+        0,                       # Data transfer length
+        0,                       # Flags
+        0,                       # LUN
+        len(command)             # Command length
+    )
+    cbw[15:15 + len(command)] = array('B', command)  # Padded to 16 bytes by the zeros
+    return cbw
+
 class PatientTransition:
     def __init__(self):
         self.device = None
@@ -68,6 +93,14 @@ class PatientTransition:
         self.command_count = 0
         self.current_state = "ANIMATION"
         self.transition_detected = False
+        # One prebuilt CBW per command, patched in place before each send;
+        # pyusb hands an array to libusb without the copy it makes of bytes
+        self._cbw_templates = {
+            command: build_cbw_template(command)
+            for command in (TEST_UNIT_READY_CMD,) + tuple(F5_COMMANDS.values())
+        }
+        self._out = array('B')  # CBW followed by its data-out phase
+        self._csw = array('B', bytes(13))  # Read in place by read_csw
         
     def connect(self):
         """Establish connection to the device with minimal intervention"""
@@ -113,41 +146,50 @@ class PatientTransition:
         logger.info("Device ready")
         return True
         
-    def send_cbw(self, command, data_length=0, is_read=False):
-        """Send a Command Block Wrapper"""
+    def send_cbw(self, command, data_length=0, is_read=False, trailing_data=None):
+        """Send a Command Block Wrapper, followed in the same bulk write by any trailing_data"""
         # Increment tag for each command
         self.tag += 1
         
-        # Construct CBW
+        # Fill in the per-call fields of this command's prebuilt CBW
         flags = 0x80 if is_read else 0x00
-        cbw = struct.pack('<4s4sII1s1s', 
-            b'USBC',                 # Signature
-            struct.pack('<I', self.tag),  # Tag
-            data_length,             # Data transfer length
-            flags,                   # Flags
-            b'\x00',                 # LUN
-            bytes([len(command)])    # Command length
-        )
-        cbw += command + b'\x00' * (16 - len(command))  # Pad command to 16 bytes
+        cbw = self._cbw_templates.get(command)
+        if cbw is None:
+            cbw = self._cbw_templates[command] = build_cbw_template(command)
+        CBW_FIELDS.pack_into(cbw, 4, self.tag, data_length, flags)
+        
+        # A data-out phase goes straight after the CBW, so the pair is one
+        # transfer instead of two
+        if trailing_data:
+            total = 31 + len(trailing_data)
+            if len(self._out) != total:
+                self._out = array('B', bytes(total))
+            with memoryview(self._out) as view:
+                view[:31] = cbw
+                view[31:] = trailing_data
+            cbw = self._out
         
         # Send CBW
         try:
-            sent = self.device.write(EP_OUT, cbw)
+            if len(cbw) <= MAX_TRANSFER:
+                self.device.write(EP_OUT, cbw)
+            else:
+                for offset in range(0, len(cbw), MAX_TRANSFER):
+                    self.device.write(EP_OUT, cbw[offset:offset + MAX_TRANSFER])
             return True
         except Exception as e:
-            logger.debug(f"CBW write error: {e}")
+            logger.debug("CBW write error: %s", e)
             return False
     
     def read_csw(self):
         """Read the Command Status Wrapper with minimal error handling"""
         try:
-            csw = self.device.read(EP_IN, 13, timeout=1500)
+            if self.device.read(EP_IN, self._csw, timeout=CSW_TIMEOUT) != 13:
+                logger.debug("Short CSW")
+                return None
             
-            # Extract data from CSW
-            csw_signature = csw[0:4]
-            csw_tag = struct.unpack('<I', csw[4:8])[0]
-            csw_data_residue = struct.unpack('<I', csw[8:12])[0]
-            csw_status = csw[12]
+            # Extract data from CSW in one pass over the read buffer
+            csw_signature, csw_tag, csw_data_residue, csw_status = CSW.unpack_from(self._csw)
             
             # Very minimal validation - just check signature
             if csw_signature != b'USBS':
@@ -161,27 +203,25 @@ class PatientTransition:
             }
         except Exception as e:
             # During Animation state, we expect errors - just log at debug level
-            logger.debug(f"CSW read error: {e}")
+            logger.debug("CSW read error: %s", e)
             return None
     
     def send_test_unit_ready(self):
         """Send TEST UNIT READY command with minimal error handling"""
         self.send_cbw(TEST_UNIT_READY_CMD)
-        time.sleep(0.5)  # Wait for device to process
         csw = self.read_csw()
         
         # Just log the result, don't try to handle errors
         if csw:
-            status_str = f"Status: {csw['status']}"
             if csw['status'] == 0:
-                logger.info(f"TEST UNIT READY: {status_str} (Success!)")
+                logger.info("TEST UNIT READY: Status: %d (Success!)", csw['status'])
                 # This might indicate transition to Connected state
                 if self.current_state == "ANIMATION" and self.command_count > 50:
                     logger.info("Possible state transition detected!")
                     self.transition_detected = True
                     self.current_state = "CONNECTING"
             else:
-                logger.debug(f"TEST UNIT READY: {status_str}")
+                logger.debug("TEST UNIT READY: Status: %d", csw['status'])
         else:
             logger.debug("TEST UNIT READY: No valid CSW")
             
@@ -190,27 +230,24 @@ class PatientTransition:
     def send_f5_command(self, subcommand, data=None, data_length=0, is_read=False):
         """Send an F5 command with minimal error handling"""
         logger.info(f"Sending F5 command {subcommand[1]:02X}")
-        self.send_cbw(subcommand, data_length, is_read)
         
-        # Send data if needed
+        # Send the CBW together with any data
         if data and not is_read:
-            try:
-                self.device.write(EP_OUT, data)
+            if self.send_cbw(subcommand, data_length or len(data), trailing_data=data):
                 logger.debug(f"Sent {len(data)} bytes of data")
-            except Exception as e:
-                logger.warning(f"Data write error: {e}")
+            else:
+                logger.warning("Data write error")
+        else:
+            self.send_cbw(subcommand, data_length, is_read)
         
         # Read data if needed
         if is_read and data_length > 0:
             try:
                 received = self.device.read(EP_IN, data_length, timeout=1500)
-                logger.info(f"Received {len(received)} bytes: {received.hex()}")
+                logger.info(f"Received {len(received)} bytes: {bytes(received).hex()}")
             except Exception as e:
                 logger.warning(f"Data read error: {e}")
         
-        # Wait before reading CSW
-        time.sleep(1.0)
-        
         # Read CSW
         csw = self.read_csw()
         if csw:
@@ -234,26 +271,31 @@ class PatientTransition:
         logger.info("Initial state: ANIMATION")
         logger.info(f"Will run for at least {duration} seconds")
         
-        start_time = time.time()
-        last_command_time = 0
+        start_time = time.monotonic()
+        end_time = start_time + duration
+        next_command = start_time
         
         # Main loop - send TEST UNIT READY commands at precisely 1-second intervals
-        while time.time() - start_time < duration:
-            current_time = time.time()
-            elapsed = int(current_time - start_time)
+        while next_command < end_time:
+            # Sleep straight through to the next 1-second mark
+            sleep_for = next_command - time.monotonic()
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+            elapsed = int(next_command - start_time)
             
-            # Ensure exactly 1 second between commands
-            if current_time - last_command_time >= 1.0:
-                logger.info(f"[{elapsed}s] Sending TEST UNIT READY ({self.command_count + 1})")
-                self.send_test_unit_ready()
-                last_command_time = time.time()
-                
-                # Display progress every 5 seconds
-                if self.command_count % 5 == 0:
-                    logger.info(f"Progress: {elapsed}/{duration} seconds, {self.command_count} commands")
+            logger.info(f"[{elapsed}s] Sending TEST UNIT READY ({self.command_count + 1})")
+            self.send_test_unit_ready()
+            
+            # Display progress every 5 seconds
+            if self.command_count % 5 == 0:
+                logger.info(f"Progress: {elapsed}/{duration} seconds, {self.command_count} commands")
             
-            # Small sleep to prevent CPU spinning
-            time.sleep(0.1)
+            # Stay on the 1-second grid; a command that overran its slot
+            # skips the marks it missed rather than being followed by a burst
+            next_command += 1.0
+            now = time.monotonic()
+            while next_command <= now:
+                next_command += 1.0
         
         logger.info(f"Completed initial transition phase: {self.command_count} commands in {duration} seconds")
         
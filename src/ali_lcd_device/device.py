@@ -9,10 +9,11 @@ import time
 import threading
 import logging
 import os
+from array import array
 
 from .lifecycle import DeviceLifecycleState, TagMonitor, LifecycleManager
 from .usb_comm import (
-    create_cbw, parse_csw, RobustUSBSession, 
+    create_cbw, parse_csw, RobustUSBSession, is_disconnect_error,
     USBError, TagMismatchError, PipeError, DeviceNotFoundError
 )
 from .commands import (
@@ -53,6 +54,9 @@ class ALiLCDDevice:
         self.lock = threading.Lock()
         self.initialized = False
         self.display_initialized = False
+        self._out_buf = array('B')  # Staging buffer for data-out payloads
+        # Cleared once a command batch fails, so callers can stop batching
+        self.pipelining = True
     
     def __enter__(self):
         """Context manager entry."""
@@ -221,7 +225,7 @@ class ALiLCDDevice:
         self.display_initialized = False
     
     def _send_command(self, command, data_length=0, direction='none', 
-                     data_out=None, check_tag=True, lun=0):
+                     data_out=None, check_tag=True, lun=0, max_xfer=None):
         """
         Send a SCSI command to the device.
         
@@ -232,6 +236,8 @@ class ALiLCDDevice:
             data_out (bytes): Data to send (for 'out' direction)
             check_tag (bool): Whether to validate the returned tag
             lun (int): Logical Unit Number
+            max_xfer (int): Largest single bulk write for the data phase,
+                or None to send it in one write
             
         Returns:
             tuple: (success, tag_mismatch, data_in)
@@ -273,7 +279,7 @@ class ALiLCDDevice:
             if direction.lower() == 'out' and data_out:
                 try:
                     logger.debug("Sending data (%d bytes)", len(data_out))
-                    self.session.with_retry(self.device.write, self.ep_out, data_out)
+                    self._write_out(self._stage_out(data_out), max_xfer)
                 except USBError as e:
                     # In Animation state, data errors are common
                     if self.lifecycle_state == DeviceLifecycleState.ANIMATION:
@@ -301,35 +307,7 @@ class ALiLCDDevice:
                 logger.debug("Reading CSW")
                 csw_data = self.session.with_retry(self.device.read, self.ep_in, 13)
                 
-                # Parse CSW
-                csw_signature, csw_tag, csw_data_residue, csw_status = parse_csw(csw_data)
-                
-                # Check tag if requested
-                tag_mismatch = csw_tag != tag
-                if tag_mismatch:
-                    logger.debug("Tag mismatch: expected %d, got %d", tag, csw_tag)
-                    
-                    # Detect tag reset
-                    self.tag_monitor.detect_tag_reset(csw_tag)
-                    
-                    # Validate based on lifecycle state
-                    if check_tag and not self.tag_monitor.validate_tag(
-                            tag, csw_tag, self.lifecycle_state):
-                        raise TagMismatchError(
-                            f"Tag mismatch: expected {tag}, got {csw_tag}")
-                
-                # Check command status
-                success = csw_status == 0
-                if not success:
-                    # In Animation state, command failures are common and expected
-                    if self.lifecycle_state == DeviceLifecycleState.ANIMATION:
-                        logger.debug("Command failed with status %d in Animation state", csw_status)
-                    else:
-                        logger.warning("Command failed with status %d", csw_status)
-                
-                # Record command in lifecycle manager
-                if self.lifecycle_manager:
-                    self.lifecycle_manager.record_command()
+                success, tag_mismatch = self._check_csw(tag, csw_data, check_tag)
                 
                 # Apply command delay based on state
                 if self.lifecycle_manager:
@@ -349,6 +327,217 @@ class ALiLCDDevice:
                     logger.error("Error in status phase: %s", str(e))
                     raise
     
+    def _check_csw(self, tag, csw_data, check_tag=True):
+        """
+        Validate a command's CSW and record the command.
+        
+        Args:
+            tag (int): The tag sent in the command's CBW
+            csw_data (bytes): The 13-byte CSW read from the device
+            check_tag (bool): Whether to validate the returned tag
+            
+        Returns:
+            tuple: (success, tag_mismatch)
+            
+        Raises:
+            ValueError: If the CSW is invalid
+            TagMismatchError: If the tag mismatches and the current state
+                does not allow it
+        """
+        # Parse CSW
+        csw_signature, csw_tag, csw_data_residue, csw_status = parse_csw(csw_data)
+        
+        # Check tag if requested
+        tag_mismatch = csw_tag != tag
+        if tag_mismatch:
+            logger.debug("Tag mismatch: expected %d, got %d", tag, csw_tag)
+            
+            # Detect tag reset
+            self.tag_monitor.detect_tag_reset(csw_tag)
+            
+            # Validate based on lifecycle state
+            if check_tag and not self.tag_monitor.validate_tag(
+                    tag, csw_tag, self.lifecycle_state):
+                raise TagMismatchError(
+                    f"Tag mismatch: expected {tag}, got {csw_tag}")
+        
+        # Check command status
+        success = csw_status == 0
+        if not success:
+            # In Animation state, command failures are common and expected
+            if self.lifecycle_state == DeviceLifecycleState.ANIMATION:
+                logger.debug("Command failed with status %d in Animation state", csw_status)
+            else:
+                logger.warning("Command failed with status %d", csw_status)
+        
+        # Record command in lifecycle manager
+        if self.lifecycle_manager:
+            self.lifecycle_manager.record_command()
+        
+        return success, tag_mismatch
+    
+    def _send_command_batch(self, commands, check_tag=True, lun=0, max_xfer=None):
+        """
+        Send several SCSI commands in one bulk write.
+        
+        Every CBW, each followed by its data-out phase if it has one, goes out
+        back to back in a single transfer. The data-in phases and CSWs are then
+        read back in command order and validated as in _send_command. Only use
+        this where the device is known to accept a CBW before the previous
+        command's CSW has been read.
+        
+        Nothing in a batch is retried, since repeating a write or read would
+        put the CBWs and CSWs out of step. If a transfer fails, the endpoints
+        are cleared and drained, and every command without a CSW yet is sent
+        again with _send_command, one at a time. pipelining is then cleared.
+        
+        Args:
+            commands (list): (command, data_length, direction, data_out) tuples,
+                with data_out None for commands without a data-out phase
+            check_tag (bool): Whether to validate the returned tags
+            lun (int): Logical Unit Number
+            max_xfer (int): Largest single bulk write, or None to send the
+                whole batch in one write
+            
+        Returns:
+            list: A (success, tag_mismatch, data_in) tuple per command
+            
+        Raises:
+            USBError: If the device disconnects or a fallback command fails
+            TagMismatchError: If a tag mismatches and the current state does
+                not allow it
+        """
+        if not self.initialized:
+            raise USBError("Device not initialized")
+        
+        results = []
+        with self.lock:
+            tags = []
+            parts = []
+            for command, data_length, direction, data_out in commands:
+                tag = self.tag_monitor.get_next_tag()
+                tags.append(tag)
+                parts.append(create_cbw(tag, data_length, direction, lun, command))
+                if direction.lower() == 'out' and data_out:
+                    parts.append(data_out)
+            
+            # Lay the whole batch out in the staging buffer
+            size = sum(len(part) for part in parts)
+            if len(self._out_buf) != size:
+                self._out_buf = array('B', bytes(size))
+            with memoryview(self._out_buf) as view:
+                offset = 0
+                for part in parts:
+                    view[offset:offset + len(part)] = part
+                    offset += len(part)
+            
+            logger.debug("Sending %d batched commands (%d bytes)", len(commands), size)
+            try:
+                self._write_out(self._out_buf, max_xfer, retry=False)
+                
+                # Each CSW is a short packet that ends its own transfer, so the
+                # responses are read one command at a time
+                for (command, data_length, direction, _), tag in zip(commands, tags):
+                    data_in = None
+                    if direction.lower() == 'in':
+                        data_in = self.device.read(self.ep_in, data_length)
+                    
+                    csw_data = self.device.read(self.ep_in, 13)
+                    results.append(self._check_csw(tag, csw_data, check_tag) + (data_in,))
+            except TagMismatchError:
+                # The CSWs of the rest of the batch may still be queued
+                self._recover_pipes()
+                raise
+            except (usb.core.USBError, ValueError) as e:
+                if isinstance(e, usb.core.USBError) and is_disconnect_error(e):
+                    raise USBError(f"Device disconnected during batch: {e}") from e
+                logger.warning("Batched command %d of %d failed (%s), sending the rest one at a time",
+                               len(results) + 1, len(commands), e)
+                self.pipelining = False
+                self._recover_pipes()
+            else:
+                # Apply command delay based on state, once for the batch
+                if self.lifecycle_manager:
+                    time.sleep(self.lifecycle_manager.get_command_delay())
+                return results
+        
+        # Outside the lock, which _send_command takes for itself
+        for command, data_length, direction, data_out in commands[len(results):]:
+            results.append(self._send_command(command, data_length, direction, data_out,
+                                              check_tag, lun, max_xfer))
+        return results
+    
+    def _recover_pipes(self):
+        """
+        Get both bulk endpoints back into a known state after a failed batch.
+        
+        Clears any halt on both endpoints, then reads and discards whatever
+        data or CSWs are still queued on the IN endpoint, so the next command
+        reads its own CSW.
+        """
+        for ep in (self.ep_out, self.ep_in):
+            try:
+                self.device.clear_halt(ep.bEndpointAddress)
+            except usb.core.USBError as e:
+                logger.debug("Failed to clear halt on endpoint 0x%02x: %s",
+                             ep.bEndpointAddress, str(e))
+        
+        while True:
+            try:
+                stale = self.device.read(self.ep_in, 512, timeout=100)
+            except usb.core.USBError:
+                break  # Nothing left, or a timeout
+            logger.debug("Discarded %d stale bytes from the IN endpoint", len(stale))
+    
+    def _stage_out(self, data):
+        """
+        Get a data-out payload into a form pyusb can write without converting.
+        
+        pyusb hands an array to libusb as is but builds a new array from
+        anything else, element by element for a memoryview or mmap. Other
+        buffers are therefore copied into a reused array with one memcpy.
+        
+        Args:
+            data: The payload (array, bytes, bytearray, memoryview or mmap)
+            
+        Returns:
+            array: The payload as an array of unsigned bytes
+        """
+        if isinstance(data, array):
+            return data
+        
+        size = len(data)
+        if len(self._out_buf) != size:
+            self._out_buf = array('B', bytes(size))
+        with memoryview(self._out_buf) as view:
+            view[:] = data
+        return self._out_buf
+    
+    def _write_out(self, data, max_xfer=None, retry=True):
+        """
+        Write a staged payload to the bulk OUT endpoint.
+        
+        Each write is a single libusb transfer, so a payload up to max_xfer
+        bytes goes out as one request and larger ones are split at max_xfer.
+        
+        Args:
+            data (array): The payload, as returned by _stage_out
+            max_xfer (int): Largest single write, or None for no limit
+            retry (bool): Retry failed writes through the session; without
+                it a failure raises the pyusb error straight away
+        """
+        size = len(data)
+        if not max_xfer or size <= max_xfer:
+            pieces = (data,)
+        else:
+            pieces = (data[offset:offset + max_xfer] for offset in range(0, size, max_xfer))
+        
+        for piece in pieces:
+            if retry:
+                self.session.with_retry(self.device.write, self.ep_out, piece)
+            else:
+                self.device.write(self.ep_out, piece)
+    
     def _test_unit_ready(self):
         """
         Send a TEST UNIT READY command.
@@ -5,6 +5,7 @@ USB communication module for ALi LCD device.
 
 import usb.core
 import usb.util
+import errno
 import time
 import logging
 import struct
@@ -15,6 +16,7 @@ logger = logging.getLogger(__name__)
 # USB constants for BOT protocol
 CBW_SIGNATURE = 0x43425355  # 'USBC' in little-endian
 CSW_SIGNATURE = 0x53425355  # 'USBS' in little-endian
+CSW_STRUCT = struct.Struct('<IIIB')  # Signature, tag, data residue, status
 
 # USB Mass Storage directions
 MS_DIRECTION_OUT = 0x00
@@ -43,6 +45,21 @@ class ResourceBusyError(USBError):
     """Exception for resource busy errors."""
     pass
 
+def is_disconnect_error(e):
+    """
+    Check whether a pyusb error means the device has gone away.
+    
+    Args:
+        e (usb.core.USBError): The error raised by pyusb
+        
+    Returns:
+        bool: True if the device is no longer present
+    """
+    if e.errno is not None:
+        return e.errno in (errno.ENODEV, errno.ESHUTDOWN)
+    # Backends that don't report an errno only leave the message to go on
+    return "No such device" in str(e)
+
 class RobustUSBSession:
     """
     Provides robust USB communication with error handling and recovery.
@@ -261,7 +278,7 @@ def parse_csw(data):
     if len(data) != 13:
         raise ValueError(f"Invalid CSW length: {len(data)}")
     
-    signature, tag, data_residue, status = struct.unpack('<IIIB', data)
+    signature, tag, data_residue, status = CSW_STRUCT.unpack(data)
     
     if signature != CSW_SIGNATURE:
         raise ValueError(f"Invalid CSW signature: 0x{signature:08x}")